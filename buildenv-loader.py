@@ -11,13 +11,19 @@ and is designed to be:
 - kept in source control, so that the script is ready to run just after project clone
 """
 
+import json
 import logging
 import os
 import re
 import shutil
 import subprocess
 import sys
+import sysconfig
+import threading
+import time
 from configparser import ConfigParser
+from contextlib import contextmanager
+from itertools import takewhile
 from pathlib import Path
 from types import SimpleNamespace
 from typing import Union
@@ -26,15 +32,79 @@ from venv import EnvBuilder
 VENV_OK = "venvOK"
 """Valid venv tag file"""
 
+VENV_INDEX = "venv.json"
+"""Cached venv location index file (in project temp scripts folder)"""
+
+VENV_STORE_USERS = "store.json"
+"""Projects using a venv store entry (in venv temp folder)"""
+
+VENV_REQUIREMENTS = "requirements.json"
+"""Installed requirements fingerprint file (in venv folder, next to venv tag file)"""
+
+ACTIVATION_ENV = "activate.env.json"
+"""Activation environment changes snapshot (in project temp folder)"""
+
+ACTIVATION_BUNDLE = "activate.bundle.sh"
+"""Concatenated activation scripts bundle (in venv bin folder)"""
+
+PROFILE_ENV = "BUILDENV_PROFILE"
+"""Environment variable enabling profiling (when set and not empty)"""
+
+PROFILE_OPTION = "--profile"
+"""Command line option enabling profiling"""
+
+PROFILE_FILE = "profile.json"
+"""Profiling trace file (in project temp folder)"""
+
+INSTALLERS = ["pip", "uv"]
+"""Supported installer backends"""
+
+BOOTSTRAP_MODES = ["twoPass", "singlePass"]
+"""Supported venv bootstrap modes"""
+
+RUN_MODES = ["script", "exec"]
+"""Supported run command modes"""
+
+MIN_PIP_VERSION = (22, 0)
+"""Minimum pip version for single pass bootstrap (older bundled pip is upgraded first)"""
+
 NEWLINE_PER_TYPE = {".sh": "\n", ".cmd": "\r\n", ".bat": "\r\n"}
 """Map of newline styles per file extension"""
 
 logger = logging.getLogger("buildenv")
 """Logger instance for buildenv module"""
 
+# Temp buildenv scripts folder
+_BUILDENV_TEMP_FOLDER = ".buildenv"
+
 # Regular expression pattern for environment variable reference in config file
 _ENV_VAR_PATTERN = re.compile("\\$\\{([a-zA-Z0-9_]+)\\}")
 
+# Requirement files lines patterns
+_REQ_COMMENT_PATTERN = re.compile("(^|\\s+)#.*$")
+_REQ_NESTED_PATTERN = re.compile("^(-r|--requirement|-c|--constraint)[ =]*(.+)$")
+_REQ_OPTION_PATTERN = re.compile("^-(?!e |-editable)")
+_REQ_PATH_OPTION_PATTERN = re.compile("^(-f|--find-links)[ =]*(.+)$")
+_REQ_LOCAL_PATTERN = re.compile("^(-e |--editable|\\.|/|[A-Za-z]:[\\\\/])|file:")
+
+# Environment variable set by the top level profiled process (so that the trace file is only reset once per profiling session)
+_PROFILE_SESSION_ENV = "_BUILDENV_PROFILE_SESSION"
+
+# Venv store entries names (venv keys)
+_STORE_KEY_PATTERN = re.compile("^[0-9a-f]{16}$")
+
+# Delay after which a lock (venv store entry, or venv requirements) is considered as stale (i.e. left behind by a killed process), in seconds
+_LOCK_STALE_DELAY = 3600
+
+# Max wait time for a venv store lock, when linking an already created entry, in seconds
+_STORE_LOCK_WAIT = 10
+
+# Delta requirements file (in project temp folder; one per process)
+_REQ_DELTA = "requirements-delta.{}.txt"
+
+# Venv requirements lock (held while syncing requirements)
+_REQ_LOCK = f"{VENV_REQUIREMENTS}.lock"
+
 # Systematically filter venv logs < ERROR (to avoid cumbersome warning messages when using junction folders on Windows)
 logging.getLogger("venv").setLevel(logging.ERROR)
 
@@ -60,6 +130,129 @@ def to_windows_path(path: Path) -> str:
     return str(path).replace("/", "\\")
 
 
+def _file_signature(path: Path) -> Union[list[int], None]:
+    # Stat signature of a file (None if it doesn't exist)
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _venv_python_version(venv_path: Path) -> Union[tuple[int, int], None]:
+    # Python major/minor version of a venv (None if unknown)
+    try:
+        with (venv_path / "pyvenv.cfg").open() as f:
+            version = re.search(r"^version(?:_info)? *= *(\d+)\.(\d+)", f.read(), re.MULTILINE)
+    except OSError:
+        return None
+    return (int(version.group(1)), int(version.group(2))) if version is not None else None
+
+
+def _dist_id(file_name: str) -> str:
+    # Normalized "name-version" identifier of a distribution, from its dist-info folder or wheel file name
+    name, version = file_name.split("-")[:2]
+    return f"{re.sub('[-_.]+', '_', name).lower()}-{version}"
+
+
+def _bundled_pip_version() -> tuple[int, ...]:
+    # Version of pip bootstrapped by ensurepip in created venvs (same python than the running one)
+    import ensurepip
+
+    return tuple(int(v) for v in re.findall(r"\d+", ensurepip.version())[:2])
+
+
+class Profiler:
+    """
+    Phases timings recorder, producing a Chrome trace file (**chrome://tracing** or https://ui.perfetto.dev)
+
+    The trace file uses the JSON array format: each profiled process (loader, **buildenv** command, activation scripts) appends its own events,
+    so that all timings end up in a single merged trace. The file is reset by the top level profiled process.
+
+    Profiling is enabled when the **BUILDENV_PROFILE** environment variable is set (and not empty).
+    """
+
+    def __init__(self):
+        self.events = []
+        self.trace_file = None
+
+    @property
+    def enabled(self) -> bool:
+        """States if profiling is enabled"""
+        return len(os.environ.get(PROFILE_ENV, "")) > 0
+
+    def enable(self):
+        """
+        Enable profiling (for this process and its child processes)
+        """
+        os.environ[PROFILE_ENV] = "1"
+
+    def start(self, folder: Path, process_name: str):
+        """
+        Start profiling session for this process (if enabled)
+
+        :param folder: Folder where to write trace file
+        :param process_name: Name of this process in trace
+        """
+        if not self.enabled:
+            return
+        self.trace_file = folder / PROFILE_FILE
+        self.events.append({"name": "process_name", "ph": "M", "pid": os.getpid(), "tid": threading.get_ident(), "args": {"name": process_name}})
+
+        # Top level process: reset trace file
+        if _PROFILE_SESSION_ENV not in os.environ:
+            os.environ[_PROFILE_SESSION_ENV] = str(os.getpid())
+            self.trace_file.unlink(missing_ok=True)
+
+    @contextmanager
+    def phase(self, name: str, category: str = "buildenv"):
+        """
+        Context manager recording a phase duration (if profiling is enabled)
+
+        :param name: Phase name
+        :param category: Phase category
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.time_ns() // 1000
+        try:
+            yield
+        finally:
+            duration = time.time_ns() // 1000 - start
+            self.events.append({"name": name, "cat": category, "ph": "X", "ts": start, "dur": duration, "pid": os.getpid(), "tid": threading.get_ident()})
+
+    def run(self, args: list[str], **kwargs) -> subprocess.CompletedProcess:
+        """
+        Run a subprocess, recording its wall time
+
+        :param args: Command arguments
+        :param kwargs: Other **subprocess.run** arguments
+        :return: Completed process
+        """
+        with self.phase(" ".join([Path(args[0]).name] + args[1:3]), "subprocess"):
+            return subprocess.run(args, **kwargs)
+
+    def save(self):
+        """
+        Append recorded events to trace file (if profiling was started)
+        """
+        if self.trace_file is None or not len(self.events):
+            return
+        events, self.events = self.events, []
+        try:
+            self.trace_file.parent.mkdir(parents=True, exist_ok=True)
+            new_file = not self.trace_file.is_file()
+            with self.trace_file.open("a") as f:
+                f.write(("[\n" if new_file else "") + "".join(json.dumps(e) + ",\n" for e in events))
+        except OSError as e:  # pragma: no cover
+            logger.warning(f"Failed to write profiling trace: {e}")
+
+
+profiler = Profiler()
+"""Profiler instance for current process"""
+
+
 class EnvContext:
     """
     Simple context class for a build env, providing some utility properties
@@ -90,6 +283,20 @@ class EnvContext:
         """Path to activation scripts folder in environment"""
         return self.bin_folder / "activate.d"
 
+    @property
+    def activation_bundle(self) -> Path:
+        """Path to concatenated activation scripts bundle in environment"""
+        return self.bin_folder / ACTIVATION_BUNDLE
+
+    @property
+    def site_packages_folder(self) -> Path:
+        """Path to site-packages folder in environment"""
+        paths_vars = {"base": str(self.root), "platbase": str(self.root)}
+        if "venv" in sysconfig.get_scheme_names():
+            # Python >=3.11: use dedicated venv scheme
+            return Path(sysconfig.get_path("purelib", "venv", paths_vars))
+        return Path(sysconfig.get_path("purelib", vars=paths_vars))  # pragma: no cover
+
 
 class _MyEnvBuilder(EnvBuilder):
     """Custom env builder class used to customize venv loading scripts"""
@@ -103,8 +310,12 @@ class _MyEnvBuilder(EnvBuilder):
         d.mkdir(parents=True, exist_ok=True)
 
         # Prepare activation loop, per supported script extension
+        # (for shell scripts: source the concatenated bundle instead, unless some script was added/removed/modified since it was generated)
+        b, sh_d = to_linux_path(e.activation_bundle), to_linux_path(d)
         activation_loop = {
-            ".sh": f"for i in {to_linux_path(d)}/*.sh; do source $i; done",
+            ".sh": f"_BUILDENV_BUNDLE_OK=0\nif test -f {b}; then\n    _BUILDENV_BUNDLE_OK=1\n"
+            + f"    for i in {sh_d} {sh_d}/*.sh; do\n        if test $i -nt {b}; then\n            _BUILDENV_BUNDLE_OK=0\n        fi\n    done\nfi\n"
+            + f"if test $_BUILDENV_BUNDLE_OK -eq 1; then\n    source {b}\nelse\n    for i in {sh_d}/*.sh; do source $i; done\nfi",
             ".bat": f"@echo off\nfor /f %%i in ('dir /b /o:n {to_windows_path(d)}\\*.bat') do (\n    call {to_windows_path(d)}\\%%i\n)",
         }
 
@@ -139,6 +350,9 @@ class BuildEnvLoader:
         self.requirements_file_pattern = self.read_config("requirements", "requirements*.txt")  # Requirements files pattern
         self.prompt = self.read_config("prompt", "buildenv")  # Prompt for buildenv
         self.look_up = self.read_config("lookUp", "true").lower() not in ["false", "0", ""]  # Look up for git root folder
+        self.venv_index = self.project_path / _BUILDENV_TEMP_FOLDER / VENV_INDEX  # Cached venv location index
+        self._index_files = [self.config_file]  # Files involved in venv location (to be recorded in index)
+        self._installer = None  # Resolved installer backend (lazy init)
 
     def read_config(self, name: str, default: str, resolve: bool = False) -> str:
         """
@@ -187,21 +401,33 @@ class BuildEnvLoader:
         """
         Find venv folder, in current project folder, or in parent ones
 
+        The resolved location is cached in an index file (in project **.buildenv** folder), which is reused as long as it was written
+        for this project, and none of the involved config files and venv tag files (including the project one) has changed
+        (so that the git look up can be skipped).
+
         :return: venv folder path, or None if no venv found
         """
 
+        # Try first with cached location
+        venv_path = self._read_venv_index()
+        if venv_path is not None:
+            return venv_path
+
         # Look up (unless disabled by config) to find venv folder (even in parent projects)
+        self._index_files = [self.config_file]
         current_path = self.project_path
         go_on = True
         while self.look_up and go_on:
             # Ask git
-            cp = subprocess.run(["git", "rev-parse", "--show-toplevel"], capture_output=True, cwd=current_path, check=False)
+            cp = profiler.run(["git", "rev-parse", "--show-toplevel"], capture_output=True, cwd=current_path, check=False)
             if cp.returncode == 0:
                 # Git root folder found: check for venv
                 candidate_path = Path(cp.stdout.decode().splitlines()[0].strip())
                 candidate_loader = BuildEnvLoader(candidate_path)
+                self._index_files.append(candidate_loader.config_file)
                 if (candidate_loader.venv_path / VENV_OK).is_file():
                     # Venv found!
+                    self._write_venv_index(candidate_loader.venv_path)
                     return candidate_loader.venv_path
 
                 # Otherwise, try parent folder
@@ -215,20 +441,175 @@ class BuildEnvLoader:
         # Last try: maybe current project is not a git folder yet
         if (self.venv_path / VENV_OK).is_file():
             # Venv found!
+            self._write_venv_index(self.venv_path)
             return self.venv_path
 
         # Can't find any valid venv
         return None
 
+    # Read venv location from index, if still valid
+    def _read_venv_index(self) -> Union[Path, None]:
+        try:
+            with self.venv_index.open() as f:
+                index = json.load(f)
+            venv_path = Path(index["venv"])
+            files = index["files"]
+            project = index["project"]
+        except (OSError, ValueError, KeyError, TypeError):
+            # Missing or corrupted index
+            return None
+
+        # Verify that index was written for this project (and not copied with it from another one)
+        if project != str(self.project_path.resolve()):
+            return None
+
+        # Verify that none of the recorded files has changed
+        for file, signature in files.items():
+            if _file_signature(Path(file)) != signature:
+                return None
+        return venv_path
+
+    # Persist venv location in index, with signatures of all files involved in the look up
+    # (including project venv tag file, even if it doesn't exist yet)
+    def _write_venv_index(self, venv_path: Path):
+        files = {str(f): _file_signature(f) for f in self._index_files + [venv_path / VENV_OK, self.venv_path / VENV_OK]}
+        try:
+            self.venv_index.parent.mkdir(parents=True, exist_ok=True)
+            with self.venv_index.open("w") as f:
+                json.dump({"project": str(self.project_path.resolve()), "venv": str(venv_path), "files": files}, f, indent=4)
+        except OSError as e:  # pragma: no cover
+            logger.debug(f"Failed to write venv index: {e}")
+
+    @property
+    def _config_pip_args(self) -> list[str]:
+        # Extra install arguments from config file
+        config_args = " ".join(self.read_config("pipInstallArgs", "", resolve=True).splitlines(keepends=False))
+        return config_args.split(" ") if len(config_args) else []
+
     @property
     def pip_args(self) -> str:
         """
         Additional arguments for "pip install" commands, read from **buildenv.cfg** project config file.
         """
-        config_args = " ".join(self.read_config("pipInstallArgs", "", resolve=True).splitlines(keepends=False))
 
         # Systematically force the "--require-virtualenv" option
-        return "--require-virtualenv" + (" " if len(config_args) else "") + config_args
+        return " ".join(["--require-virtualenv"] + self._config_pip_args)
+
+    @property
+    def installer(self) -> str:
+        """
+        Installer backend used to install packages in venv (one of **INSTALLERS**), read from **buildenv.cfg** project config file.
+
+        Falls back to **pip** if configured installer can't be found.
+        """
+        if self._installer is None:
+            installer = self.read_config("installer", "pip").lower()
+            assert installer in INSTALLERS, f"Unknown installer: {installer} (supported ones: {', '.join(INSTALLERS)})"
+            if installer != "pip" and shutil.which(installer) is None:
+                logger.warning(f"{installer} installer not found, falling back to pip")
+                installer = "pip"
+            self._installer = installer
+        return self._installer
+
+    @property
+    def bootstrap_mode(self) -> str:
+        """
+        Venv bootstrap mode (one of **BOOTSTRAP_MODES**), read from **buildenv.cfg** project config file.
+        """
+        bootstrap_mode = self.read_config("bootstrapMode", "twoPass")
+        assert bootstrap_mode in BOOTSTRAP_MODES, f"Unknown bootstrap mode: {bootstrap_mode} (supported ones: {', '.join(BOOTSTRAP_MODES)})"
+        return bootstrap_mode
+
+    @property
+    def run_mode(self) -> str:
+        """
+        Run command mode (one of **RUN_MODES**), read from **buildenv.cfg** project config file.
+        """
+        run_mode = self.read_config("runMode", "script")
+        assert run_mode in RUN_MODES, f"Unknown run mode: {run_mode} (supported ones: {', '.join(RUN_MODES)})"
+        return run_mode
+
+    @property
+    def wheelhouse(self) -> Union[Path, None]:
+        """
+        Path to shared wheelhouse folder (or None if disabled), read from **buildenv.cfg** project config file.
+        """
+        wheelhouse = self.read_config("wheelhouse", "", resolve=True)
+        return (self.project_path / Path(wheelhouse).expanduser()) if len(wheelhouse) else None
+
+    def install_command(self, executable: Path, packages: list[str], upgrade: bool = False, eager: bool = False) -> list[str]:
+        """
+        Build install command for configured installer backend
+
+        :param executable: Path to venv python executable
+        :param packages: Packages to be installed (or requirement files options)
+        :param upgrade: Upgrade packages if already installed
+        :param eager: Eager upgrade strategy (i.e. also upgrade dependencies)
+        :return: Install command arguments
+        """
+        if self.installer == "uv":
+            # uv: target python is explicit, and --upgrade already applies to all dependencies
+            return (
+                ["uv", "pip", "install", "--python", str(executable)] + (["--upgrade"] if upgrade else []) + packages + self._find_links + self._config_pip_args
+            )
+        return (
+            [str(executable), "-m", "pip", "install"]
+            + (["--upgrade"] if upgrade else [])
+            + (["--upgrade-strategy=eager"] if eager else [])
+            + packages
+            + self._find_links
+            + self.pip_args.split(" ")
+        )
+
+    @property
+    def _find_links(self) -> list[str]:
+        # Look for packages in wheelhouse first (if any)
+        wheelhouse = self.wheelhouse
+        return [f"--find-links={wheelhouse}"] if wheelhouse is not None and wheelhouse.is_dir() else []
+
+    def _update_wheelhouse(self, context: EnvContext):
+        # Nothing to do if wheelhouse is disabled
+        wheelhouse = self.wheelhouse
+        if wheelhouse is None:
+            return
+
+        # Installed packages (except the ones installed from a direct URL, e.g. local or editable ones, which can't be reused from wheelhouse)
+        installed = {_dist_id(d.name[: -len(".dist-info")]) for d in context.site_packages_folder.glob("*.dist-info") if not (d / "direct_url.json").is_file()}
+
+        # Build wheels only for installed packages not in wheelhouse yet (pinned, so that pip doesn't need to resolve them again)
+        wheelhouse.mkdir(parents=True, exist_ok=True)
+        missing = sorted(installed - {_dist_id(w.name) for w in wheelhouse.glob("*.whl")})
+        if len(missing):
+            logger.info("Updating wheelhouse...")
+            cp = profiler.run(
+                [str(context.executable), "-m", "pip", "wheel", "--quiet", "--no-deps", f"--wheel-dir={wheelhouse}", f"--find-links={wheelhouse}"]
+                + ["==".join(m.split("-", 1)) for m in missing]
+                + self._config_pip_args,
+                cwd=self.project_path,
+                check=False,
+            )
+            if cp.returncode != 0:
+                logger.warning("Failed to update wheelhouse (some packages may not be cached)")
+
+        # Touch wheels of packages installed in this venv, so that they are seen as recently used
+        wheels = []
+        for wheel in wheelhouse.glob("*.whl"):
+            try:
+                if _dist_id(wheel.name) in installed:
+                    wheel.touch()
+                wheels.append((wheel.stat().st_mtime_ns, wheel.stat().st_size, wheel))
+            except OSError:  # pragma: no cover
+                # Concurrently evicted by another venv setup
+                pass
+
+        # Evict least recently used wheels, until wheelhouse fits in max size
+        max_size = int(self.read_config("wheelhouseMaxSize", "1024")) * 1024 * 1024
+        total_size = sum(size for _, size, _ in wheels)
+        for _, size, wheel in sorted(wheels):
+            if total_size <= max_size:
+                break
+            wheel.unlink(missing_ok=True)
+            total_size -= size
 
     @property
     def default_packages(self) -> list[str]:
@@ -244,6 +625,40 @@ class BuildEnvLoader:
         """
         return [req_file.name for req_file in self.project_path.glob(self.requirements_file_pattern)]
 
+    @property
+    def venv_store(self) -> Union[Path, None]:
+        """
+        Path to shared venv store folder (or None if disabled), read from **buildenv.cfg** project config file.
+        """
+        store = self.read_config("venvStore", "", resolve=True)
+        return (self.project_path / Path(store).expanduser()) if len(store) else None
+
+    @property
+    def venv_key(self) -> str:
+        """
+        Key of the project venv in store (hash of everything that is involved in venv content)
+
+        Requirements are read from all requirement files (including nested ones), and constraints files are identified by their content.
+        If some requirements are local ones (e.g. editable or path requirements), the key is also specific to this project.
+        """
+        import hashlib
+
+        # Requirement entries (constraints files only through their content hash)
+        _, entries = self._requirements_fingerprint()
+        requirements = [e.split("  # ")[-1] if e.startswith("--constraint=") else e for e in entries]
+
+        key_data = {
+            "python": os.path.realpath(sys.executable),
+            "version": list(sys.version_info),
+            "packages": self.default_packages,
+            "requirements": requirements,
+            "project": str(self.project_path.resolve()) if any(_REQ_LOCAL_PATTERN.search(e) for e in requirements) else None,
+            "pipInstallArgs": self._config_pip_args,
+            "installer": self.installer,
+            "bootstrapMode": self.bootstrap_mode,
+        }
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()[:16]
+
     def setup_venv(self, with_venv: Path = None) -> EnvContext:
         """
         Prepare python environment builder, and create environment if it doesn't exist yet
@@ -253,42 +668,349 @@ class BuildEnvLoader:
         """
 
         # Look for venv
-        venv_path = with_venv if with_venv is not None and with_venv.is_dir() else self.find_venv()
-        missing_venv = venv_path is None
+        with profiler.phase("find venv"):
+            venv_path = with_venv if with_venv is not None and with_venv.is_dir() else self.find_venv()
+        if venv_path is not None and with_venv is None:
+            with profiler.phase("sync requirements"):
+                if not self._sync_requirements(venv_path):
+                    # Requirements don't match anymore with venv linked from store
+                    venv_path = None
+        if venv_path is None:
+            # Forget previous (invalid) link to store, if any
+            if self.venv_path.is_symlink():
+                self.venv_path.unlink()
+
+            # Reuse venv from store if possible, otherwise create it in project
+            with profiler.phase("create venv"):
+                if self.venv_store is None or not self._link_store_venv(self.venv_store):
+                    self._create_venv(self.venv_path)
+                self._write_requirements_fingerprint(self.venv_path, *self._requirements_fingerprint())
+                self._write_venv_index(self.venv_path)
+            venv_path = self.venv_path
+
+        return self._get_context(venv_path)
+
+    def _get_context(self, venv_path: Path) -> EnvContext:
+        # Get venv context (venv may be a link to a store entry, which is not supported by EnvBuilder: use link path anyway)
+        context = _MyEnvBuilder(symlinks=os.name != "nt", prompt=self.prompt).ensure_directories(venv_path.resolve() if venv_path.is_symlink() else venv_path)
+        context.env_dir = str(venv_path)
+        return EnvContext(context)
+
+    def _requirements_fingerprint(self) -> tuple[dict[str, list[int]], list[str]]:
+        # Parse all requirement files (including nested ones), and return involved files signatures + requirement entries
+        files = {}
+        entries = []
+
+        def parse(req_file: Path, constraint: bool):
+            # Remember file (once)
+            if str(req_file) in files:
+                return
+            files[str(req_file)] = _file_signature(req_file)
+            if not req_file.is_file():
+                return
+            with req_file.open() as f:
+                content = f.read()
+
+            # Constraints file: only remember its content hash
+            if constraint:
+                import hashlib
+
+                entries.append(f"--constraint={req_file}  # {hashlib.sha256(content.encode()).hexdigest()}")
+                return
+
+            # Iterate on lines (without comments, and with joined continuation lines)
+            for line in filter(len, (_REQ_COMMENT_PATTERN.sub("", line).strip() for line in content.replace("\\\n", "").splitlines())):
+                m = _REQ_NESTED_PATTERN.match(line)
+                if m is not None:
+                    # Nested requirements or constraints file, relative to current one
+                    parse(req_file.parent / m.group(2).strip(), m.group(1) in ["-c", "--constraint"])
+                    continue
 
-        # Create env builder and remember context
-        env_builder = _MyEnvBuilder(clear=missing_venv and self.venv_path.is_dir(), symlinks=os.name != "nt", with_pip=True, prompt=self.prompt)
-        context = EnvContext(env_builder.ensure_directories(self.venv_path if missing_venv else venv_path))
+                # Path option, relative to current file (if it exists, as for pip): make it absolute, as entries may be written in another folder
+                m = _REQ_PATH_OPTION_PATTERN.match(line)
+                if m is not None and (req_file.parent / m.group(2).strip()).exists():
+                    line = f"{m.group(1)} {(req_file.parent / m.group(2).strip()).resolve()}"
+                entries.append(line)
+
+        for req_file in sorted(self.requirement_files):
+            parse(self.project_path / req_file, False)
+        return files, entries
+
+    def _read_requirements_fingerprints(self, venv_path: Path) -> dict[str, dict]:
+        # Read requirements fingerprints of all projects using this venv
+        try:
+            with (venv_path / VENV_REQUIREMENTS).open() as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_requirements_fingerprint(self, venv_path: Path, files: dict[str, list[int]], entries: list[str]):
+        # Persist requirements fingerprint for this project
+        fingerprints = self._read_requirements_fingerprints(venv_path)
+        fingerprints[str(self.project_path)] = {"files": files, "entries": entries}
+        try:
+            # Written in a temporary file first, as it may be read concurrently
+            temp_file = venv_path / f"{VENV_REQUIREMENTS}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with temp_file.open("w") as f:
+                json.dump(fingerprints, f, indent=4)
+            os.replace(temp_file, venv_path / VENV_REQUIREMENTS)
+        except OSError as e:  # pragma: no cover
+            logger.debug(f"Failed to write requirements fingerprint: {e}")
+
+    def requirement_inputs(self, venv_path: Path) -> list[Path]:
+        """
+        List of requirement files (including nested ones) involved in the installed project requirements, as recorded in the venv
 
-        if missing_venv:
-            # Prepare pip install extra args, if any
-            pip_args = self.pip_args.split(" ")
+        :param venv_path: Path to venv
+        :return: List of existing requirement files
+        """
+        fingerprint = self._read_requirements_fingerprints(venv_path).get(str(self.project_path), {"files": {}})
+        return [Path(f) for f, signature in fingerprint["files"].items() if signature is not None]
 
-            # Setup venv (unless path contains spaces)
-            assert " " not in str(self.venv_path), (
-                "Current path contains spaces, which definitely doesn't work with some of venv generated scripts.\n"
-                + "Please consider moving your project in a path without spaces."
-            )
-            logger.info("Creating venv...")
-            env_builder.clear = False
-            env_builder.create(self.venv_path)
-
-            # Install requirements
-            logger.info("Installing requirements...")
-            subprocess.run([str(context.executable), "-m", "pip", "install", "--upgrade"] + self.default_packages + pip_args, cwd=self.project_path, check=True)
-            all_requirements = self.requirement_files
-            if len(all_requirements):
-                subprocess.run(
-                    [str(context.executable), "-m", "pip", "install"] + [f"--requirement={req_file}" for req_file in all_requirements] + pip_args,
-                    cwd=self.project_path,
-                    check=True,
-                )
-
-            # If we get here, venv is valid
-            logger.info("Python venv is ready!")
-            (self.venv_path / VENV_OK).touch()
-
-        return context
+    def activation_inputs(self, venv_bin_path: Path) -> list[Path]:
+        """
+        List of activation files, invalidating the activation environment snapshot when modified
+
+        :param venv_bin_path: Path to venv bin folder
+        :return: List of activation files (may not exist)
+        """
+        activate_d = venv_bin_path / "activate.d"
+        return [self.project_path / _BUILDENV_TEMP_FOLDER / "activate.sh", venv_bin_path / "activate", activate_d] + sorted(activate_d.glob("*.sh"))
+
+    def _check_requirements(self, venv_path: Path) -> bool:
+        # Quick check: nothing to do if all involved files are unchanged
+        stored = self._read_requirements_fingerprints(venv_path).get(str(self.project_path), None)
+        return (
+            stored is not None
+            and {str(self.project_path / r) for r in self.requirement_files}.issubset(stored["files"])
+            and all(_file_signature(Path(f)) == signature for f, signature in stored["files"].items())
+        )
+
+    def _sync_requirements(self, venv_path: Path) -> bool:
+        if self._check_requirements(venv_path):
+            return True
+
+        # Something changed: sync exclusively, as the venv may be shared with other processes (or other projects)
+        lock = self._lock(venv_path / _REQ_LOCK, _LOCK_STALE_DELAY)
+        try:
+            # Check again once locked (requirements may have just been synced by another process)
+            return self._check_requirements(venv_path) or self._sync_requirements_locked(venv_path)
+        finally:
+            if lock is not None:
+                lock.unlink(missing_ok=True)
+
+    def _sync_requirements_locked(self, venv_path: Path) -> bool:
+        # Compare requirement entries
+        stored = self._read_requirements_fingerprints(venv_path).get(str(self.project_path), None)
+        files, entries = self._requirements_fingerprint()
+        if stored is not None and entries != stored["entries"]:
+            # Venv linked from store must be linked to another entry
+            if venv_path.is_symlink() and venv_path == self.venv_path:
+                logger.info("Requirements changed: looking for another venv in store")
+                return False
+
+            # Install added/changed requirements (or all of them if options changed)
+            previous = set(stored["entries"])
+            options = [e for e in entries if _REQ_OPTION_PATTERN.match(e)]
+            all_changed = any(o not in previous for o in options)
+            delta = [e for e in entries if e not in options and (all_changed or e not in previous)]
+            if len(delta):
+                logger.info("Installing updated requirements...")
+                delta_file = self.project_path / _BUILDENV_TEMP_FOLDER / _REQ_DELTA.format(os.getpid())
+                delta_file.parent.mkdir(parents=True, exist_ok=True)
+                with delta_file.open("w") as f:
+                    f.write("\n".join(options + delta) + "\n")
+                try:
+                    profiler.run(
+                        self.install_command(self._get_context(venv_path).executable, [f"--requirement={delta_file}"]), cwd=self.project_path, check=True
+                    )
+                finally:
+                    delta_file.unlink(missing_ok=True)
+
+        # Remember new fingerprint
+        self._write_requirements_fingerprint(venv_path, files, entries)
+        return True
+
+    @property
+    def venv_template(self) -> Union[Path, None]:
+        """
+        Path to template venv to be cloned when creating venv (or None if disabled or unusable), read from **buildenv.cfg** project config file.
+        """
+        template = self.read_config("venvTemplate", "", resolve=True)
+        if not len(template):
+            return None
+        template_path = self.project_path / Path(template).expanduser()
+
+        # Check template is usable
+        if os.name == "nt":  # pragma: no cover
+            logger.warning("Venv template is not supported on Windows")
+            return None
+        if not (template_path / VENV_OK).is_file():
+            logger.warning(f"Venv template not found, or not created by buildenv: {template_path}")
+            return None
+        if _venv_python_version(template_path) != sys.version_info[:2]:
+            logger.warning(f"Venv template doesn't match with current python version: {template_path}")
+            return None
+        return template_path
+
+    def _clone_venv(self, template: Path, context: EnvContext):
+        def link_or_copy(src: str, dst: str):
+            # Hardlink if possible (same file system), otherwise copy
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+
+        # Share template installed packages
+        logger.info(f"Cloning venv from {template}...")
+        template_context = EnvContext(SimpleNamespace(env_dir=str(template), bin_name=context.context.bin_name, python_exe=context.context.python_exe))
+        shutil.copytree(template_context.site_packages_folder, context.site_packages_folder, copy_function=link_or_copy, dirs_exist_ok=True)
+
+        # Copy installed scripts (the ones not generated by venv, nor the activation bundle, which is generated by buildenv), with updated venv path
+        template_bin, new_bin = str(template_context.bin_folder), str(context.bin_folder)
+        for script in filter(
+            lambda p: p.is_file() and p.name != ACTIVATION_BUNDLE and not (context.bin_folder / p.name).exists(), template_context.bin_folder.iterdir()
+        ):
+            dest = context.bin_folder / script.name
+            with script.open("rb") as f:
+                content = f.read()
+            if content.startswith(b"#!"):
+                # Script: update interpreter path
+                for old_bin in {template_bin, str(Path(template_bin).resolve())}:
+                    content = content.replace(old_bin.encode(), new_bin.encode())
+                with dest.open("wb") as f:
+                    f.write(content)
+                shutil.copymode(script, dest)
+            else:
+                # Binary file: share it
+                link_or_copy(str(script), str(dest))
+
+    def _create_venv(self, venv_path: Path):
+        # Create env builder
+        # (pip is only bootstrapped with ensurepip if used as installer, and if not provided by template)
+        template = self.venv_template
+        with_pip = self.installer == "pip" and template is None
+        env_builder = _MyEnvBuilder(clear=venv_path.is_dir(), symlinks=os.name != "nt", with_pip=with_pip, prompt=self.prompt)
+        context = EnvContext(env_builder.ensure_directories(venv_path))
+
+        # Setup venv (unless path contains spaces)
+        assert " " not in str(venv_path), (
+            "Current path contains spaces, which definitely doesn't work with some of venv generated scripts.\n"
+            + "Please consider moving your project in a path without spaces."
+        )
+        logger.info("Creating venv...")
+        env_builder.clear = False
+        with profiler.phase("venv builder"):
+            env_builder.create(venv_path)
+        if template is not None:
+            # Start from template venv packages (so that only the delta is installed)
+            self._clone_venv(template, context)
+
+        # Install requirements
+        logger.info("Installing requirements...")
+        requirement_args = [f"--requirement={req_file}" for req_file in self.requirement_files]
+        if self.bootstrap_mode == "singlePass":
+            # Upgrade pip first only if bundled one is too old, then resolve everything at once
+            if self.installer == "pip" and _bundled_pip_version() < MIN_PIP_VERSION:
+                profiler.run(self.install_command(context.executable, ["pip"], upgrade=True), cwd=self.project_path, check=True)
+            profiler.run(self.install_command(context.executable, self.default_packages + requirement_args, upgrade=True), cwd=self.project_path, check=True)
+        else:
+            # Default packages first, then requirement files
+            profiler.run(self.install_command(context.executable, self.default_packages, upgrade=True), cwd=self.project_path, check=True)
+            if len(requirement_args):
+                profiler.run(self.install_command(context.executable, requirement_args), cwd=self.project_path, check=True)
+
+        # Keep installed packages in wheelhouse, for next venvs setup
+        self._update_wheelhouse(context)
+
+        # If we get here, venv is valid
+        logger.info("Python venv is ready!")
+        (venv_path / VENV_OK).touch()
+
+    def _link_store_venv(self, store: Path) -> bool:
+        # Lock store entry: only one process can build it, and it can't be garbage collected until it is linked
+        # (wait a bit if entry is already created, as other processes only hold the lock while linking it)
+        key = self.venv_key
+        entry = store / key
+        store.mkdir(parents=True, exist_ok=True)
+        lock = self._lock(store / f"{key}.lock", _STORE_LOCK_WAIT if (entry / VENV_OK).is_file() else 0)
+        if lock is None:
+            logger.warning(f"Venv {key} is being created in store by another process; creating it in project instead")
+            return False
+        try:
+            # Build venv in store if not done yet
+            if not (entry / VENV_OK).is_file():
+                self._create_venv(entry)
+                self._update_store_users(entry, [])
+
+            # Link project venv to store entry
+            if self.venv_path.is_dir():
+                shutil.rmtree(self.venv_path)
+            try:
+                os.symlink(entry, self.venv_path, target_is_directory=True)
+            except OSError as e:
+                logger.warning(f"Failed to link venv from store ({e}); creating it in project instead")
+                return False
+
+            # Remember users of this entry
+            self._update_store_users(entry, [self.venv_path])
+        finally:
+            lock.unlink(missing_ok=True)
+        logger.info(f"Using venv {key} from store")
+
+        # Remove unused entries (only the ones created by buildenv, and not being used by another process)
+        for other in filter(
+            lambda p: _STORE_KEY_PATTERN.match(p.name) and p != entry and (p / VENV_OK).is_file() and (p / _BUILDENV_TEMP_FOLDER / VENV_STORE_USERS).is_file(),
+            store.iterdir(),
+        ):
+            other_lock = self._lock(store / f"{other.name}.lock")
+            if other_lock is None:
+                continue
+            try:
+                if not self._update_store_users(other, []):
+                    logger.info(f"Removing unused venv {other.name} from store")
+                    shutil.rmtree(other, ignore_errors=True)
+            finally:
+                other_lock.unlink(missing_ok=True)
+        return True
+
+    def _lock(self, lock: Path, timeout: float = 0) -> Union[Path, None]:
+        # Exclusively create a lock file (waiting for it up to timeout seconds), removing stale locks left by killed processes
+        deadline = time.time() + timeout
+        while True:
+            try:
+                os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return lock
+            except FileExistsError:
+                pass
+            try:
+                if lock.stat().st_mtime < time.time() - _LOCK_STALE_DELAY:
+                    logger.warning(f"Removing stale lock: {lock}")
+                    lock.unlink()
+                    continue
+            except OSError:  # pragma: no cover
+                # Lock just released
+                continue
+            if time.time() >= deadline:
+                return None
+            time.sleep(0.1)
+
+    def _update_store_users(self, entry: Path, new_users: list[Path]) -> list[str]:
+        # Read users of this store entry, and only keep the ones still linked to it
+        users_file = entry / _BUILDENV_TEMP_FOLDER / VENV_STORE_USERS
+        users = set(str(u) for u in new_users)
+        try:
+            with users_file.open() as f:
+                users.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        users = sorted(u for u in users if Path(u).is_symlink() and Path(u).resolve() == entry.resolve())
+
+        # Persist them (users file also marks the folder as a store entry)
+        users_file.parent.mkdir(parents=True, exist_ok=True)
+        with users_file.open("w") as f:
+            json.dump(users, f, indent=4)
+        return users
 
     def setup(self, args: list[str]) -> int:
         """
@@ -298,11 +1020,73 @@ class BuildEnvLoader:
         :returns: Forwarded **buildenv** command return code
         """
 
-        # Prepare venv
-        context = self.setup_venv()
+        # Enable profiling if required (only options before sub-command are considered)
+        if PROFILE_OPTION in takewhile(lambda a: a.startswith("-"), args):
+            profiler.enable()
+        profiler.start(self.project_path / _BUILDENV_TEMP_FOLDER, "buildenv-loader")
+
+        try:
+            # Prepare venv
+            with profiler.phase("setup venv"):
+                context = self.setup_venv()
 
-        # Delegate to build env manager
-        return subprocess.run([str(context.executable), "-m", "buildenv"] + args, cwd=self.project_path, check=False).returncode
+            # Delegate to build env manager
+            return profiler.run([str(context.executable), "-m", "buildenv"] + args, cwd=self.project_path, check=False).returncode
+        finally:
+            profiler.save()
+
+
+def activate(project_path: Union[Path, str] = None) -> dict[str, str]:
+    """
+    Activate build environment in current python process (without any shell): update **os.environ** and **sys.path** from the project venv.
+
+    Environment changes captured by last **buildenv init** (from all activation scripts) are also applied, if still up to date.
+
+    :param project_path: Project folder (default: current directory)
+    :return: Activated environment, to be used for subprocesses
+    """
+    import site
+
+    # Find project venv
+    loader = BuildEnvLoader(Path(project_path) if project_path is not None else Path.cwd())
+    venv_path = loader.find_venv()
+    assert venv_path is not None, f"No build environment found for {loader.project_path} (run loading script first)"
+    assert _venv_python_version(venv_path) == sys.version_info[:2], f"Build environment doesn't match with current python version: {venv_path}"
+    context = loader._get_context(venv_path)
+
+    # Basic venv activation
+    env = dict(os.environ)
+    env.pop("PYTHONHOME", None)
+    env["VIRTUAL_ENV"] = str(venv_path)
+
+    # Captured environment changes (only if newer than all activation files), already including venv bin folder in PATH
+    changes = [["prepend", "PATH", str(context.bin_folder) + os.pathsep]]
+    snapshot = loader.project_path / _BUILDENV_TEMP_FOLDER / ACTIVATION_ENV
+    if snapshot.is_file():
+        snapshot_time = snapshot.stat().st_mtime_ns
+        if all(p.stat().st_mtime_ns <= snapshot_time for p in filter(lambda p: p.exists(), loader.activation_inputs(context.bin_folder))):
+            with snapshot.open() as f:
+                changes = json.load(f)["changes"]
+
+    # Apply changes (only once, if activated several times)
+    for op, name, value in changes:
+        current = env.get(name, "")
+        if op == "unset":
+            env.pop(name, None)
+        elif op == "prepend":
+            env[name] = current if current.startswith(value) else value + current
+        elif op == "append":
+            env[name] = current if current.endswith(value) else current + value
+        else:
+            env[name] = value
+
+    # Update current process
+    for name in set(os.environ) - set(env):
+        del os.environ[name]
+    os.environ.update(env)
+    if str(context.site_packages_folder) not in sys.path:
+        site.addsitedir(str(context.site_packages_folder))
+    return env
 
 
 # Loading script entry point
@@ -0,0 +1,45 @@
+@ECHO OFF
+:: This file is generated by buildenv tool -- see https://buildenv.readthedocs.io/
+:: Please do not edit, changes will be lost
+
+:: Check if python is installed
+setlocal
+fakePython --version > NUL 2> NUL
+set _BUILDENV_RC=%ERRORLEVEL%
+if %_BUILDENV_RC% NEQ 0 (
+    echo|set /p="[ERROR] fakePython is not installed" & echo.
+    goto end
+)
+
+:: Wrap to buildenv script (with a unique run ID)
+:: RANDOM is seeded from current time: run ID is reserved by atomically creating a folder, to be unique across processes started at the same time
+:runid
+set _BUILDENV_RUN_ID=%RANDOM%-%RANDOM%-%RANDOM%
+mkdir .buildenv\run.%_BUILDENV_RUN_ID% 2> NUL || goto runid
+fakePython buildenv-loader.py --from-loader=cmd --run-id=%_BUILDENV_RUN_ID% %*
+set _BUILDENV_RC=%ERRORLEVEL%
+
+:: Check for specific RC
+if %_BUILDENV_RC% EQU 100 goto shell
+if %_BUILDENV_RC% EQU 102 goto run
+goto end
+
+:shell
+:: Spawn shell if required
+cmd /k .buildenv\shell.cmd
+set _BUILDENV_RC=%ERRORLEVEL%
+goto end
+
+:run
+:: Execute command script generated for this run ID (if found)
+set _BUILDENV_CMD=.buildenv\command.%_BUILDENV_RUN_ID%.cmd
+if not exist %_BUILDENV_CMD% goto end
+cmd /c %_BUILDENV_CMD%
+set _BUILDENV_RC=%ERRORLEVEL%
+del %_BUILDENV_CMD%
+goto end
+
+:end
+if defined _BUILDENV_RUN_ID rmdir .buildenv\run.%_BUILDENV_RUN_ID% 2> NUL
+exit /b %_BUILDENV_RC%
+
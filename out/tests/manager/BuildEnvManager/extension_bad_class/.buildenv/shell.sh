@@ -0,0 +1,15 @@
+#!/usr/bin/bash
+# This file is generated by buildenv tool -- see https://buildenv.readthedocs.io/
+# Please do not edit, changes will be lost
+
+# Load user profile (if any)
+if test -e ~/.bashrc; then
+    source ~/.bashrc
+fi
+
+# Activate venv
+source .buildenv/activate.sh
+
+# Welcome message
+echo "Welcome to buildenv shell!"
+
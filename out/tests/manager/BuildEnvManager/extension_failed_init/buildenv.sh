@@ -0,0 +1,92 @@
+#!/usr/bin/bash
+# This file is generated by buildenv tool -- see https://buildenv.readthedocs.io/
+# Please do not edit, changes will be lost
+
+# Fast path: if build environment is already initialized, shell and run commands don't need python
+if test -z "${VIRTUAL_ENV}" && test -f .buildenv/fastpath.sh; then
+    # Load manifest
+    source .buildenv/fastpath.sh
+
+    # Check venv tag file and state manifest
+    _BUILDENV_FAST_OK=0
+    if test -f ${_BUILDENV_FAST_VENV_OK} && test -f ${_BUILDENV_FAST_STATE}; then
+        _BUILDENV_FAST_OK=1
+    fi
+
+    # Check that inputs were not modified since manifest generation
+    for _BUILDENV_INPUT in ${_BUILDENV_FAST_INPUTS}; do
+        if test ${_BUILDENV_INPUT} -nt .buildenv/fastpath.sh; then
+            _BUILDENV_FAST_OK=0
+        fi
+    done
+
+    if test ${_BUILDENV_FAST_OK} -eq 1; then
+        if test $# -eq 0 || test "$*" = "shell"; then
+            # Spawn shell directly (unless in CI, where this is refused)
+            if test -z "${CI}"; then
+                ${SHELL} --rcfile .buildenv/shell.sh
+                exit $?
+            fi
+        elif test "$1" = "run" && test $# -gt 1; then
+            # Execute command directly
+            shift
+            if test "${_BUILDENV_FAST_RUN_MODE}" = "exec"; then
+                exec ${SHELL} -c 'source .buildenv/activate.env.sh; exec "$@"' "${SHELL}" "$@"
+            fi
+            ${SHELL} -c "source .buildenv/activate.env.sh; $*"
+            exit $?
+        fi
+    fi
+fi
+
+# Check if python is installed
+if test -f /git-bash.exe; then
+    _BUILDENV_PYTHON=python
+else
+    _BUILDENV_PYTHON=python3
+fi
+${_BUILDENV_PYTHON} --version 2>/dev/null 1>&2
+if test $? -ne 0; then
+    echo "[ERROR] ${_BUILDENV_PYTHON} is not installed"
+    exit 1
+fi
+
+# Export profiling flag if "--profile" option is set (before sub-command), for spawned shell and command activation scripts
+for _BUILDENV_ARG in "$@"; do
+    case "${_BUILDENV_ARG}" in
+        --profile) export BUILDENV_PROFILE=1 ;;
+        -*) ;;
+        *) break ;;
+    esac
+done
+
+# Wrap to buildenv script (with a unique run ID)
+_BUILDENV_RUN_ID=$$-${RANDOM}${RANDOM}
+${_BUILDENV_PYTHON} buildenv-loader.py --from-loader=sh --run-id=${_BUILDENV_RUN_ID} "$@"
+_BUILDENV_RC=$?
+
+# Check for specific RC
+if test ${_BUILDENV_RC} -eq 100; then
+    # Spawn shell if required
+    ${SHELL} --rcfile .buildenv/shell.sh
+    _BUILDENV_RC=$?
+elif test ${_BUILDENV_RC} -eq 101; then
+    # Execute command arguments directly (i.e. all arguments following "run" sub-command)
+    while test $# -gt 0 && test "$1" != "run"; do
+        shift
+    done
+    shift
+    exec ${SHELL} -c 'source .buildenv/activate.env.sh; exec "$@"' "${SHELL}" "$@"
+elif test ${_BUILDENV_RC} -eq 102; then
+    # Execute command script generated for this run ID
+    _BUILDENV_CMD=.buildenv/command.${_BUILDENV_RUN_ID}.sh
+    if test -f ${_BUILDENV_CMD}; then
+        ${SHELL} -c ${_BUILDENV_CMD}
+        _BUILDENV_RC=$?
+        rm ${_BUILDENV_CMD}
+    fi
+fi
+
+# Forward RC
+exit ${_BUILDENV_RC}
+
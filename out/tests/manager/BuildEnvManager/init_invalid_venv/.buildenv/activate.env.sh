@@ -0,0 +1,8 @@
+#!/usr/bin/bash
+# This file is generated by buildenv tool -- see https://buildenv.readthedocs.io/
+# Please do not edit, changes will be lost
+
+# Activation environment can't be captured: always load activation scripts
+source .buildenv/activate.sh
+
+
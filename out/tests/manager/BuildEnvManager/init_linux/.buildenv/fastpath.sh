@@ -0,0 +1,16 @@
+#!/usr/bin/bash
+# This file is generated by buildenv tool -- see https://buildenv.readthedocs.io/
+# Please do not edit, changes will be lost
+
+# Venv tag file
+_BUILDENV_FAST_VENV_OK="venv/venvOK"
+
+# Build environment state manifest
+_BUILDENV_FAST_STATE=".buildenv/state.json"
+
+# Run command mode
+_BUILDENV_FAST_RUN_MODE="script"
+
+# Inputs invalidating this manifest if modified (last modification: 1792352262525522477)
+_BUILDENV_FAST_INPUTS="venv/lib/python3.11/site-packages buildenv.cfg .buildenv/state.json "
+
@@ -0,0 +1,25 @@
+#!/usr/bin/bash
+# This file is generated by buildenv tool -- see https://buildenv.readthedocs.io/
+# Please do not edit, changes will be lost
+
+# Check that activation files were not modified since environment was captured
+_BUILDENV_SNAPSHOT_OK=1
+for _BUILDENV_INPUT in .buildenv/activate.sh ../../../../../venv/bin/activate ../../../../../venv/bin/activate.d ../../../../../venv/bin/activate.d/*.sh; do
+    if test ${_BUILDENV_INPUT} -nt .buildenv/activate.env.sh; then
+        _BUILDENV_SNAPSHOT_OK=0
+    fi
+done
+
+if test ${_BUILDENV_SNAPSHOT_OK} -eq 1; then
+    # Replay captured environment changes
+    :
+    export PATH=/root/package/venv/bin:"${PATH}"
+    export PS1='(venv) '
+    export VIRTUAL_ENV=/root/package/venv
+    export VIRTUAL_ENV_PROMPT='(venv) '
+else
+    # Outdated snapshot: load activation scripts
+    source .buildenv/activate.sh
+fi
+
+
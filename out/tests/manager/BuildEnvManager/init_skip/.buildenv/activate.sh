@@ -0,0 +1,16 @@
+#!/usr/bin/bash
+# This file is generated by buildenv tool -- see https://buildenv.readthedocs.io/
+# Please do not edit, changes will be lost
+
+# Activate venv
+if test -n "${BUILDENV_PROFILE}" && test -f .buildenv/profile.json && test "$(date +%N)" != "N"; then
+    # Profiling: time each activation script, and append timings to trace file
+    for _BUILDENV_SCRIPT in ../../../../../venv/bin/activate.d/*.sh; do
+        _BUILDENV_START=$(date +%s%6N)
+        source ${_BUILDENV_SCRIPT}
+        echo "{\"name\": \"activate $(basename ${_BUILDENV_SCRIPT})\", \"cat\": \"shell\", \"ph\": \"X\", \"ts\": ${_BUILDENV_START}, \"dur\": $(($(date +%s%6N) - _BUILDENV_START)), \"pid\": $$, \"tid\": $$}," >>.buildenv/profile.json
+    done
+else
+    source ../../../../../venv/bin/activate
+fi
+
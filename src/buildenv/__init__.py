@@ -1,15 +1,42 @@
 """
 Python main module for **buildenv** tool.
-"""
 
-from importlib.metadata import version
+Public classes and version are lazily loaded, so that the command line interface only imports modules it really needs.
+"""
 
 __title__ = "buildenv"
-try:
-    __version__ = version(__title__)
-except Exception:  # pragma: no cover
-    __version__ = "unknown"
 
-from buildenv.manager import BuildEnvExtension, BuildEnvLoader, BuildEnvManager
+__all__ = ("BuildEnvManager", "BuildEnvLoader", "BuildEnvExtension", "activate")
+
+# Lazily loaded attributes: name -> (module, attribute)
+_LAZY_ATTRIBUTES = {
+    "BuildEnvManager": ("buildenv.manager", "BuildEnvManager"),
+    "BuildEnvLoader": ("buildenv.loader", "BuildEnvLoader"),
+    "BuildEnvExtension": ("buildenv.extension", "BuildEnvExtension"),
+    "activate": ("buildenv.loader", "activate"),
+}
+
+
+def _read_version() -> str:
+    from importlib.metadata import version
+
+    try:
+        return version(__title__)
+    except Exception:  # pragma: no cover
+        return "unknown"
+
+
+def __getattr__(name: str):
+    if name == "__version__":
+        value = _read_version()
+    elif name in _LAZY_ATTRIBUTES:
+        import importlib
+
+        module_name, attribute = _LAZY_ATTRIBUTES[name]
+        value = getattr(importlib.import_module(module_name), attribute)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-__all__ = ("BuildEnvManager", "BuildEnvLoader", "BuildEnvExtension")
+    # Remember value for next accesses
+    globals()[name] = value
+    return value
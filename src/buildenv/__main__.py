@@ -1,33 +1,84 @@
 import logging
+import os
 import sys
+from argparse import Namespace
+from contextlib import nullcontext
+from itertools import takewhile
 from pathlib import Path
+from typing import Callable
 
 from buildenv._internal.parser import BuildEnvParser, RCHolder
-from buildenv.loader import logger
-from buildenv.manager import BuildEnvManager
 
 # Current directory
 _CWD = Path.cwd()
 
+# Same logger than buildenv.loader one (not imported here, to keep the command line interface startup fast)
+logger = logging.getLogger("buildenv")
+
+# Same profiling option/env var than buildenv.loader ones
+_PROFILE_OPTION = "--profile"
+_PROFILE_ENV = "BUILDENV_PROFILE"
+
+
+class _LazyManager:
+    """
+    Build env manager proxy, only creating the manager when a command callback is invoked
+    (i.e. not when parser is only used for completion)
+
+    :param project_path: Path to the current project root folder
+    :param venv_bin_path: Path to venv binary folder to be used
+    """
+
+    def __init__(self, project_path: Path, venv_bin_path: Path):
+        self.project_path = project_path
+        self.venv_bin_path = venv_bin_path
+        self._manager = None
+
+    def callback(self, name: str) -> Callable:
+        """
+        Get a lazy callback to a manager method
+
+        :param name: Manager method name
+        :return: Callback, creating the manager on first call
+        """
+
+        def lazy_callback(options: Namespace):
+            if self._manager is None:
+                from buildenv.manager import BuildEnvManager
+
+                self._manager = BuildEnvManager(self.project_path, self.venv_bin_path)
+            return getattr(self._manager, name)(options)
+
+        return lazy_callback
+
 
 def buildenv(args: list[str], project_path: Path = _CWD, venv_bin_path: Path = None) -> int:
     # This is the "buildenv" command logic
 
-    # Invoke build env manager on current project directory
-    b = BuildEnvManager(project_path, venv_bin_path)
+    # Prepare lazy build env manager on current project directory
+    b = _LazyManager(project_path, venv_bin_path)
+
+    # Start profiling if required (only options before sub-command are considered)
+    profiler = None
+    if _PROFILE_OPTION in takewhile(lambda a: a.startswith("-"), args) or len(os.environ.get(_PROFILE_ENV, "")) > 0:
+        from buildenv.loader import _BUILDENV_TEMP_FOLDER, profiler
 
-    # Prepare parser
-    p = BuildEnvParser(
-        b.init,  # Init callback
-        b.shell,  # Shell callback
-        b.run,  # Run callback
-        b.upgrade,  # Upgrade callback
-    )
+        profiler.enable()
+        profiler.start(project_path / _BUILDENV_TEMP_FOLDER, "buildenv")
 
     # Execute parser
     try:
+        # Prepare parser (exits here if invoked for completion)
+        p = BuildEnvParser(
+            b.callback("init"),  # Init callback
+            b.callback("shell"),  # Shell callback
+            b.callback("run"),  # Run callback
+            b.callback("upgrade"),  # Upgrade callback
+        )
+
         # Delegate execution to parser
-        p.execute(args)
+        with profiler.phase("buildenv " + " ".join(args)) if profiler is not None else nullcontext():
+            p.execute(args)
         return 0
     except RCHolder as e:
         # Specific return code to be used
@@ -36,6 +87,9 @@ def buildenv(args: list[str], project_path: Path = _CWD, venv_bin_path: Path = N
         # An error occurred
         logger.error(str(e))
         return 1
+    finally:
+        if profiler is not None:
+            profiler.save()
 
 
 def main() -> int:  # pragma: no cover
@@ -1,10 +1,24 @@
-from argparse import REMAINDER, SUPPRESS, ArgumentParser
+import os
+from argparse import REMAINDER, SUPPRESS, Action, ArgumentParser
 from pathlib import Path
 from typing import Callable
 
-import argcomplete
+# Return codes
+RC_START_SHELL = 100  # RC used to tell loading script to spawn an interactive shell
+RC_RUN_EXEC = 101  # RC used to tell loading script to execute command arguments directly
+RC_RUN_SCRIPT = 102  # RC used to tell loading script to execute the command script generated for its run ID
 
-from buildenv import __version__
+
+class _VersionAction(Action):
+    # Version action, reading version only if required
+    def __init__(self, option_strings: list[str], dest: str = SUPPRESS, default: str = SUPPRESS, help: str = "show program's version number and exit"):
+        super().__init__(option_strings=option_strings, dest=dest, default=default, nargs=0, help=help)
+
+    def __call__(self, parser: ArgumentParser, namespace, values, option_string=None):
+        from buildenv import __version__
+
+        print(f"buildenv version {__version__}")
+        parser.exit()
 
 
 class RCHolder(Exception):  # NOQA: N818
@@ -37,8 +51,10 @@ class BuildEnvParser:
         self._parser = ArgumentParser(prog="buildenv", description="Build environment manager")
 
         # Version handling
-        self._parser.add_argument("-V", "--version", action="version", version=f"buildenv version {__version__}")
+        self._parser.add_argument("-V", "--version", action=_VersionAction)
         self._parser.add_argument("--from-loader", help=SUPPRESS, default=None, action="store")
+        self._parser.add_argument("--run-id", help=SUPPRESS, default=None, action="store")
+        self._parser.add_argument("--profile", action="store_true", default=False, help="record phases timings in .buildenv/profile.json trace file")
         self._parser.set_defaults(func=None, init_func=init_cb, shell_func=shell_cb)
 
         # Add subcommands:
@@ -51,9 +67,7 @@ class BuildEnvParser:
         g = init_parser.add_mutually_exclusive_group()
         g.add_argument("--force", "-f", action="store_true", default=False, help="force buildenv init to be triggered again")
         g.add_argument("--skip", "-s", action="store_true", default=False, help="skip extensions and activation scripts generation")
-        init_parser.add_argument(
-            "--new", metavar="FOLDER", action="store", type=Path, default=None, help="create a new buildenv in specified folder"
-        ).completer = argcomplete.DirectoriesCompleter()
+        new_arg = init_parser.add_argument("--new", metavar="FOLDER", action="store", type=Path, default=None, help="create a new buildenv in specified folder")
 
         # shell sub-command
         shell_help = "start an interactive shell with loaded build environment"
@@ -72,8 +86,12 @@ class BuildEnvParser:
         upgrade_parser.set_defaults(func=upgrade_cb)
         upgrade_parser.add_argument("--eager", action="store_true", default=False, help="toggle eager upgrade strategy")
 
-        # Handle completion
-        argcomplete.autocomplete(self._parser)
+        # Handle completion (only if invoked from completion script; exits in this case)
+        if "_ARGCOMPLETE" in os.environ:
+            import argcomplete
+
+            new_arg.completer = argcomplete.DirectoriesCompleter()
+            argcomplete.autocomplete(self._parser)
 
     def execute(self, args: list[str]):
         """
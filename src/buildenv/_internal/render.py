@@ -1,10 +1,14 @@
+import hashlib
+import os
 import stat
-import subprocess
+from functools import cache
 from pathlib import Path
+from typing import Callable, Union
 
-from jinja2 import Template
+from jinja2 import BaseLoader, Environment, FileSystemBytecodeCache, TemplateNotFound
 
-from buildenv.loader import NEWLINE_PER_TYPE, BuildEnvLoader, logger, to_linux_path, to_windows_path
+from buildenv._internal.parser import RC_RUN_EXEC, RC_RUN_SCRIPT, RC_START_SHELL
+from buildenv.loader import NEWLINE_PER_TYPE, BuildEnvLoader, logger, profiler, to_linux_path, to_windows_path
 
 # Path to bundled template files
 _TEMPLATES_FOLDER = Path(__file__).parent.parent / "templates"
@@ -15,20 +19,56 @@ _COMMENT_PER_TYPE = {".py": "# ", ".sh": "# ", ".cmd": ":: "}
 # Map of file header per file extension
 _HEADERS_PER_TYPE = {".py": "", ".sh": "#!/usr/bin/bash\n", ".cmd": "@ECHO OFF\n"}
 
-# Return codes
-RC_START_SHELL = 100  # RC used to tell loading script to spawn an interactive shell
+
+class _TemplatesLoader(BaseLoader):
+    """
+    Jinja loader for templates, either bundled ones (relative path) or contributed ones (absolute path)
+    """
+
+    def get_source(self, environment: Environment, template: str) -> tuple[str, str, Callable[[], bool]]:
+        # Resolve template path
+        path = Path(template)
+        if not path.is_absolute():
+            path = _TEMPLATES_FOLDER / template
+        if not path.is_file():
+            raise TemplateNotFound(template)
+
+        # Load template source, and remember modification time to check if template is up to date
+        mtime = path.stat().st_mtime_ns
+        with path.open() as f:
+            source = f.read()
+        return source, str(path), lambda: path.is_file() and path.stat().st_mtime_ns == mtime
+
+
+@cache
+def _get_environment(cache_path: Path) -> Environment:
+    # Shared Jinja environment (per bytecode cache folder)
+    cache_path.mkdir(parents=True, exist_ok=True)
+    return Environment(loader=_TemplatesLoader(), bytecode_cache=FileSystemBytecodeCache(str(cache_path)))
 
 
 class TemplatesRenderer:
     """
     Build env templates renderer
+
+    Compiled templates are shared by all renderers, and persisted in bytecode cache folder, to be reused across processes.
+
+    Target files are only written if their content changed, and git executable bits are only set when
+    calling :meth:`flush_git_chmod` (in a single git command for all pending files).
+
+    :param loader: Build env loader instance
+    :param relative_venv_bin_path: Path to venv bin folder, relative to project folder
+    :param project_script_path: Path to project generated scripts folder
+    :param cache_path: Path to compiled templates cache folder
     """
 
-    def __init__(self, loader: BuildEnvLoader, relative_venv_bin_path: Path, project_script_path: Path) -> None:
+    def __init__(self, loader: BuildEnvLoader, relative_venv_bin_path: Path, project_script_path: Path, cache_path: Path) -> None:
         self.loader = loader
         self.relative_venv_bin_path = relative_venv_bin_path
         self.project_script_path = project_script_path
         self.project_path = self.project_script_path.parent
+        self.environment = _get_environment(cache_path)
+        self.pending_git_chmod: list[Path] = []
 
     def render(self, template: Path, target: Path, executable: bool = False, keywords: dict[str, str] = None):
         """
@@ -39,7 +79,10 @@ class TemplatesRenderer:
         :param executable: States if target file as to be set as executable
         :param keyword: Map of keywords provided to template
         """
+        with profiler.phase(f"render {target.name}", "render"):
+            self._render(template, target, executable, keywords)
 
+    def _render(self, template: Path, target: Path, executable: bool, keywords: dict[str, str]):
         # Check target file suffix
         target_type = target.suffix
 
@@ -52,6 +95,8 @@ class TemplatesRenderer:
             "cmdVenvBinPath": to_windows_path(self.relative_venv_bin_path),
             "shVenvBinPath": to_linux_path(self.relative_venv_bin_path),
             "rcStartShell": RC_START_SHELL,
+            "rcRunExec": RC_RUN_EXEC,
+            "rcRunScript": RC_RUN_SCRIPT,
             "buildenvPrompt": self.loader.prompt,
             "venvName": self.relative_venv_bin_path.parent.name,
         }
@@ -59,9 +104,7 @@ class TemplatesRenderer:
             all_keywords.update(keywords)
 
         # Build fragments list
-        fragments = [
-            template if (isinstance(template, Path) and template.is_absolute()) else (_TEMPLATES_FOLDER / template),
-        ]
+        fragments = [str(template)]
 
         # Check for know type
         if target_type in _HEADERS_PER_TYPE and target_type in _COMMENT_PER_TYPE:
@@ -74,36 +117,60 @@ class TemplatesRenderer:
             )
 
             # Add warning header
-            fragments.insert(0, _TEMPLATES_FOLDER / "warning.jinja")
+            fragments.insert(0, "warning.jinja")
 
         # Iterate on fragments
         generated_content = ""
         for fragment in fragments:
-            # Load template
-            with fragment.open() as f:
-                t = Template(f.read())
-                generated_content += t.render(all_keywords)
-                generated_content += "\n\n"
-
-        # Create target directory if needed
-        target.parent.mkdir(parents=True, exist_ok=True)
+            # Load template (compiled templates are cached)
+            generated_content += self.environment.get_template(fragment).render(all_keywords)
+            generated_content += "\n\n"
 
-        # Generate target
+        # Generate target (only if content changed, to keep modification time stable)
         newline = NEWLINE_PER_TYPE.get(target_type, None)
-        with target.open("w", newline=newline) as f:
-            f.write(generated_content)
+        if not self._is_unchanged(target, generated_content, newline):
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with target.open("w", newline=newline) as f:
+                f.write(generated_content)
 
         # Make script executable if required
         if executable and target_type == ".sh":
             # System chmod
-            target.chmod(target.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+            mode = target.stat().st_mode
+            exec_mode = mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH
+            if exec_mode != mode:
+                target.chmod(exec_mode)
 
             # Git chmod: only if not a .buildenv relative script (not persisted on git)
             try:
                 rel_path = target.relative_to(self.project_path)
             except ValueError:  # pragma: no cover
                 rel_path = None
-            if (target.parent != self.project_script_path) and (rel_path is not None):
-                cp = subprocess.run(["git", "update-index", "--chmod=+x", str(rel_path)], capture_output=True, check=False, cwd=self.project_path)
-                if cp.returncode != 0:
-                    logger.warning(f"Failed to chmod {target.name} file with git (file not in index yet, or maybe git not installed?)")
+            if (target.parent != self.project_script_path) and (rel_path is not None) and (rel_path not in self.pending_git_chmod):
+                self.pending_git_chmod.append(rel_path)
+
+    # Check if target file already holds the expected content
+    def _is_unchanged(self, target: Path, content: str, newline: Union[str, None]) -> bool:
+        if not target.is_file():
+            return False
+        # Same newline translation than text mode writing
+        newline = os.linesep if newline is None else newline
+        expected = (content if newline in ("", "\n") else content.replace("\n", newline)).encode()
+        if target.stat().st_size != len(expected):
+            return False
+        with target.open("rb") as f:
+            return hashlib.sha256(f.read()).digest() == hashlib.sha256(expected).digest()
+
+    def flush_git_chmod(self):
+        """
+        Set git executable bit on all pending generated scripts, in a single git command
+        """
+
+        # Anything to do?
+        if not self.pending_git_chmod:
+            return
+        rel_paths, self.pending_git_chmod = self.pending_git_chmod, []
+        cp = profiler.run(["git", "update-index", "--chmod=+x"] + [str(p) for p in rel_paths], capture_output=True, check=False, cwd=self.project_path)
+        if cp.returncode != 0:
+            names = ", ".join(p.name for p in rel_paths)
+            logger.warning(f"Failed to chmod {names} file with git (file not in index yet, or maybe git not installed?)")
@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Union
 
 
 class BuildEnvExtension(ABC):
@@ -9,6 +11,20 @@ class BuildEnvExtension(ABC):
     :type manager: BuildEnvManager
     """
 
+    dependencies: list[str] = []
+    """
+    Names of extensions (as declared in "buildenv_init" entry point) which must be initialized before this one.
+
+    Extensions which don't depend on each other are initialized concurrently. Unknown extensions names are ignored.
+    """
+
+    cacheable: bool = True
+    """
+    States if this extension version can be cached by the manager (see :py:meth:`get_version`).
+
+    Extensions computing their version at runtime (e.g. from files which are not part of their distribution) must set this attribute to False.
+    """
+
     def __init__(self, manager):
         self.manager = manager
         pass
@@ -25,6 +41,9 @@ class BuildEnvExtension(ABC):
 
         The self.manager attribute can be used to access to the manager instance.
 
+        Note that this method may be called from a worker thread, concurrently with other extensions init methods
+        (unless declared in :py:attr:`dependencies`).
+
         :param force: Tells the extension if the **--force** argument was used on the **buildenv init** command line.
         """
         pass
@@ -35,8 +54,30 @@ class BuildEnvExtension(ABC):
         Method called by manager to know extension version.
 
         This version is used by manager to be compared to version used last time the init was done.
-        If it differs, previous activation scripts are deleted, and init method is called again.
+        If it differs, init method is called again, and activation scripts previously added by this extension are replaced
+        (other extensions are not initialized again).
+
+        Note that returned version is cached by the manager, as long as installed distributions don't change
+        (i.e. extensions are not even loaded if nothing changed in the venv). Versions are not cached if some extension is installed
+        in editable mode, or opts out through the :py:attr:`cacheable` attribute.
 
         :return: Extension version string
         """
         pass
+
+    def get_inputs(self) -> list[Union[Path, str]]:
+        """
+        Method called by manager to know extension inputs (optional; no inputs by default).
+
+        Inputs are fingerprinted by the manager: files (provided as **Path** instances, relative to project folder if not absolute)
+        are hashed from their content, and other values are hashed from their string representation.
+        If this fingerprint differs from the one computed last time the init was done, init method is called again
+        (even if version didn't change).
+
+        Note that input files can be checked without loading extensions, while input values can only be computed by loaded extensions:
+        as soon as an extension declares some input values, all extensions are loaded each time the build environment is initialized
+        (even if the discovery cache is valid, see :py:meth:`get_version`).
+
+        :return: List of input files and values
+        """
+        return []
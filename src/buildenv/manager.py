@@ -1,19 +1,52 @@
+import hashlib
 import importlib.metadata
+import json
 import os
-import random
+import re
+import site
 import subprocess
 import sys
+import threading
+import time
 from argparse import Namespace
+from functools import cached_property
 from pathlib import Path
+from typing import Union
 
 from buildenv import __version__
-from buildenv._internal.parser import RCHolder
-from buildenv._internal.render import RC_START_SHELL, TemplatesRenderer
+from buildenv._internal.parser import RC_RUN_EXEC, RC_RUN_SCRIPT, RC_START_SHELL, RCHolder
 from buildenv.extension import BuildEnvExtension
-from buildenv.loader import BuildEnvLoader, logger
+from buildenv.loader import ACTIVATION_ENV, VENV_OK, BuildEnvLoader, logger, profiler, to_linux_path
 
-BUILDENV_OK = "buildenvOK"
-"""Valid buildenv tag file"""
+STATE_MANIFEST = "state.json"
+"""Build environment state manifest file (in project temp scripts folder)"""
+
+STATE_FORMAT = 1
+"""State manifest format version"""
+
+COMPLETION_CACHE = "completion.json"
+"""Pre-generated completion code cache file (in venv buildenv folder)"""
+
+EXTENSIONS_CACHE = "extensions.json"
+"""Extensions discovery cache file (in venv buildenv folder)"""
+
+FAST_PATH_MANIFEST = "fastpath.sh"
+"""Fast path manifest file (checked by loading script to skip python startup when build environment is ready)"""
+
+ACTIVATION_SNAPSHOT = "activate.env.sh"
+"""Activation environment snapshot file (replayed by run commands instead of loading all activation scripts)"""
+
+# Marker between environment dumps when capturing activation snapshot
+_SNAPSHOT_MARKER = "--buildenv-activated--"
+
+# Environment variables which are not recorded in activation snapshot
+_SNAPSHOT_IGNORED_VARS = ["_", "PWD", "OLDPWD", "SHLVL"]
+
+# Environment variables set by an activated venv
+_VENV_ENV_VARS = ["VIRTUAL_ENV", "VIRTUAL_ENV_PROMPT", "_OLD_VIRTUAL_PATH", "_OLD_VIRTUAL_PS1", "_OLD_VIRTUAL_PYTHONHOME"]
+
+# Owner name of activation files contributed by buildenv itself
+_BUILDENV_OWNER = "buildenv"
 
 # Temp buildenv scripts folder
 _BUILDENV_TEMP_FOLDER = ".buildenv"
@@ -25,9 +58,75 @@ _MODULE_FOLDER = Path(__file__).parent
 _RECOMMENDED_GIT_FILES = [".gitignore", ".gitattributes"]
 
 # Return codes
-_RC_RUN_CMD = 101  # Start of RC range for running a command
+_RC_RUN_CMD = 103  # Start of RC range for running a command script (legacy loading scripts, without run ID)
 _RC_MAX = 255  # Max RC
 
+# Valid run ID characters (run ID is used in command script name)
+_RUN_ID_PATTERN = re.compile("^[0-9A-Za-z-]+$")
+
+# Delay after which a command script is considered as stale (i.e. left behind by a killed loading script), in seconds
+_STALE_COMMAND_DELAY = 24 * 3600
+
+# Activation script constructs that can't be concatenated in the bundle
+# (a top-level "return" would skip following scripts, and BASH_SOURCE would refer to the bundle instead of the script)
+_BUNDLE_COMMENT_PATTERN = re.compile(r"^\s*#.*$", re.MULTILINE)
+_BUNDLE_FUNCTION_PATTERN = re.compile(r"^(\s*)(?:function\s+[\w:.-]+\s*(?:\(\))?|[\w:.-]+\s*\(\))\s*\{.*?^\1\}", re.MULTILINE | re.DOTALL)
+_BUNDLE_RETURN_PATTERN = re.compile(r"\breturn\b")
+
+
+# Check if a generated file exists and is newer than all (existing) inputs
+def _is_up_to_date(target: Path, inputs: list[Path]) -> bool:
+    if not target.is_file():
+        return False
+    target_time = target.stat().st_mtime_ns
+    return all(p.stat().st_mtime_ns <= target_time for p in filter(lambda p: p.exists(), inputs))
+
+
+# Hash of a file content (None if it can't be read)
+def _file_hash(path: Path) -> Union[str, None]:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+# Check if a distribution is installed in editable mode
+def _is_editable(dist: importlib.metadata.Distribution) -> bool:
+    try:
+        return json.loads(dist.read_text("direct_url.json") or "{}").get("dir_info", {}).get("editable", False)
+    except ValueError:
+        return False
+
+
+# Check if an activation script can be concatenated in the bundle
+def _is_bundle_safe(script: Path) -> bool:
+    content = _BUNDLE_COMMENT_PATTERN.sub("", script.read_text())
+    if "BASH_SOURCE" in content:
+        return False
+    # "return" is fine in function bodies
+    return _BUNDLE_RETURN_PATTERN.search(_BUNDLE_FUNCTION_PATTERN.sub("", content)) is None
+
+
+# Shell command replaying an environment change
+def _replay_command(op: str, name: str, value: str) -> str:
+    import shlex
+
+    if op == "unset":
+        return f"unset {name}"
+    if op == "prepend":
+        return f'export {name}={shlex.quote(value)}"${{{name}}}"'
+    if op == "append":
+        return f'export {name}="${{{name}}}"{shlex.quote(value)}'
+    return f"export {name}={shlex.quote(value)}"
+
+
+# Path relative to another one (either with resolved symlinks, or not: venv may be a link to a store entry)
+def _relative_to(path: Path, other: Path) -> Path:
+    try:
+        return path.resolve().relative_to(other.resolve())
+    except ValueError:
+        return Path(os.path.abspath(path)).relative_to(os.path.abspath(other))
+
 
 class BuildEnvManager:
     """
@@ -46,23 +145,30 @@ class BuildEnvManager:
         # Other initializations
         self.project_path = project_path  # Current project path
         self.project_script_path = self.project_path / _BUILDENV_TEMP_FOLDER  # Current project generated scripts path
+        self.venv_script_path = self.venv_path / _BUILDENV_TEMP_FOLDER  # Venv buildenv data path
         self.loader = BuildEnvLoader(self.project_path)  # Loader instance
         self.is_windows = (self.venv_bin_path / "activate.bat").is_file()  # Is Windows venv?
         self.venv_context = self.loader.setup_venv(self.venv_bin_path.parent)
-        self.buildenv_ok = self.venv_path / BUILDENV_OK
-        self.project_buildenv_ok = self.project_script_path / BUILDENV_OK
+        self.state_manifest = self.project_script_path / STATE_MANIFEST
+        self.fast_path_manifest = self.project_script_path / FAST_PATH_MANIFEST
+        self.activation_snapshot = self.project_script_path / ACTIVATION_SNAPSHOT
 
         # Private data
+        self._state = None
+        self._local = threading.local()  # Extension currently contributing to the build environment (per thread)
+        self._contributions = {}  # Contributions (activation files, completion commands, ignored patterns) of initialized extensions
+        self._replaced_files = {}  # Activation files of re-initialized extensions, which may be generated again
+        self._pending_files = {}  # Activation files added by extensions being initialized (generated once all extensions are initialized)
         self._completion_commands = set()
         self.register_completion("buildenv")
         self._ignored_patterns = []
-        self.register_ignored_pattern(self.venv_path.name + "/")
+        self.register_ignored_pattern(self.venv_path.name + ("" if self.venv_path.is_symlink() else "/"))  # Venv may be a link to store
         self.register_ignored_pattern(_BUILDENV_TEMP_FOLDER + "/")
         self.is_valid_projet = True
 
         try:
             # Relative venv bin path string for local scripts
-            relative_venv_bin_path = self.venv_bin_path.resolve().relative_to(self.project_path.resolve())
+            relative_venv_bin_path = _relative_to(self.venv_bin_path, self.project_path)
 
             # Venv is relative to current project
             self.is_project_venv = True
@@ -82,8 +188,19 @@ class BuildEnvManager:
                 relative_venv_bin_path = None
                 self.is_valid_projet = False
 
-        # Prepare template renderer
-        self.renderer = TemplatesRenderer(self.loader, relative_venv_bin_path, self.project_script_path)
+        # Remember relative venv path for template renderer
+        self._relative_venv_bin_path = relative_venv_bin_path
+
+    @cached_property
+    def renderer(self):
+        """
+        Templates renderer (lazily created, to import it only when rendering is required)
+
+        :rtype: buildenv._internal.render.TemplatesRenderer
+        """
+        from buildenv._internal.render import TemplatesRenderer
+
+        return TemplatesRenderer(self.loader, self._relative_venv_bin_path, self.project_script_path, self.venv_script_path / "templates")
 
     def init(self, options: Namespace = None):
         """
@@ -97,6 +214,9 @@ class BuildEnvManager:
         * invoke extra environment initializers defined by sub-classes
         * mark buildenv as ready
 
+        Activation scripts bundle and environment snapshot are finally refreshed, if any activation file was modified,
+        and git executable bits are set on all generated scripts.
+
         :param options: Input command line parsed options
         """
 
@@ -110,36 +230,88 @@ class BuildEnvManager:
         # Check for valid project
         assert self.is_valid_projet, "Out of project folder!"
 
-        # Update scripts if not done yet
+        # Expected scripts state is computed once per init (inputs may have changed since a previous init)
+        self.__dict__.pop("_scripts_state", None)
+
+        # Update scripts if not done yet (or if fast path manifest is outdated)
         force = False if not hasattr(options, "force") else options.force
-        if force or not self._check_versions({}):
-            self._update_scripts(hasattr(options, "from_loader") and options.from_loader is not None)
+        if force or not self._check_state() or not self._check_fast_path():
+            with profiler.phase("update scripts"):
+                self._update_scripts(hasattr(options, "from_loader") and options.from_loader is not None)
 
-        # Stop here if required to skip
+        # Refresh extensions (unless required to skip)
         skip = False if not hasattr(options, "skip") else options.skip
-        if skip:
+        if not skip:
+            self._refresh_extensions(force)
+
+        # Refresh activation bundle and snapshot once all activation files are generated
+        self._update_activation_bundle()
+        self._update_activation_snapshot(force)
+
+        # Generate fast path manifest last (state manifest is one of its inputs), once extensions are initialized
+        if self.state.get("extensions") is not None and not self._check_fast_path():
+            self._update_fast_path()
+
+        # Set git executable bits on all generated scripts (including extensions ones), all at once
+        # (only if something was rendered: renderer is not even created otherwise)
+        if "renderer" in self.__dict__:
+            self.renderer.flush_git_chmod()
+
+    # Load extensions and refresh buildenv if something changed
+    def _refresh_extensions(self, force: bool):
+        # Check versions from discovery cache first: extensions are only loaded if something changed
+        with profiler.phase("read extensions cache"):
+            cached_versions = self._read_extensions_cache()
+        if not force and cached_versions is not None and self._check_extensions(cached_versions) and self._check_inputs():
             return
 
         # Prepare entry points
-        all_extensions = self._parse_extensions()
+        with profiler.phase("parse extensions"):
+            all_extensions = self._parse_extensions()
 
         # Refresh buildenv if not done yet
-        if force or not self._check_versions(all_extensions):
+        versions = {n: e.get_version() for n, e in all_extensions.items()}
+        inputs = {n: self._inputs_fingerprint(e) for n, e in all_extensions.items()}
+        if force or not self._check_extensions(versions) or self.state.get("inputs") != inputs:
             logger.info("Customizing buildenv...")
 
             try:
-                # Clean existing scripts
-                self._clean_activation_files()
+                # List existing scripts
+                existing_files = self._existing_activation_files
             except AssertionError as e:
-                # Clean failed: print warning and give up
+                # Not a buildenv venv: print warning and give up
                 logger.warning(str(e))
                 return
 
-            # Clean was successful: continue with initialization
-            self._run_extensions(all_extensions, force)
-            self._add_activation_files()
+            # Previous contributions (unknown for a new venv)
+            previous_versions, previous_inputs = self.state.get("extensions"), self.state.get("inputs") or {}
+            contributions = self.state.get("contributions") if previous_versions is not None else None
+            if force or contributions is None:
+                # Forced or unknown contributions: clean all existing scripts, and initialize all extensions
+                self._clean_activation_files(existing_files)
+                previous_versions, contributions = {}, {}
+
+            # Only initialize again new extensions, or extensions which version or inputs changed
+            changed = [n for n in versions if previous_versions.get(n) != versions[n] or previous_inputs.get(n) != inputs[n] or n not in contributions]
+            replaced = [n for n in contributions if n not in versions or n in changed] + [_BUILDENV_OWNER]
+            kept = {n: c for n, c in contributions.items() if n not in replaced}
+
+            # Replaced activation files are generated again in place (or removed if not contributed anymore)
+            self._replaced_files = {n: list(contributions.get(n, {}).get("activationFiles", [])) for n in replaced}
+            self._run_extensions({n: all_extensions[n] for n in changed}, force)
+
+            # Merge contributions (in extensions order)
+            for contribution in (kept.get(n) or self._contributions[n] for n in versions):
+                self._completion_commands.update(contribution["completion"])
+                self._ignored_patterns.extend(contribution["ignoredPatterns"])
+            with profiler.phase("add activation files"):
+                self._add_activation_files()
+            for file in (f for files in self._replaced_files.values() for f in files):
+                (self.venv_context.activation_scripts_folder / file).unlink(missing_ok=True)
+            self._replaced_files = {}
+
             self._verify_git_files()
-            self._make_ready(self.buildenv_ok)
+            self._write_state(extensions=versions, inputs=inputs, contributions=dict(kept, **self._contributions))
             logger.info("Buildenv is ready!")
 
     # Copy/update loading scripts in project folder
@@ -158,8 +330,146 @@ class BuildEnvManager:
             self.renderer.render("activate.cmd.jinja", self.project_script_path / "activate.cmd")
             self.renderer.render("shell.cmd.jinja", self.project_script_path / "shell.cmd")
 
-        # Touch project buildenv file
-        self._make_ready(self.project_buildenv_ok)
+        # Remember scripts state (extensions need to be initialized again in a new venv)
+        scripts_state = dict(self._scripts_state)
+        if any(self.state.get(k) != scripts_state[k] for k in ("venv", "venvStamp")):
+            scripts_state["extensions"] = None
+        self._write_state(**scripts_state)
+
+    # Inputs which are invalidating the fast path manifest when modified
+    @property
+    def _fast_path_inputs(self) -> list[Path]:
+        # (including requirement files, to let the loader sync them when modified, and extensions input files; even outside of the project)
+        # (normalized, as nested requirement files paths may be relative to their parent, e.g. "../shared/requirements.txt")
+        requirement_files = self.loader.requirement_inputs(self.venv_path)
+        input_files = (Path(p) for inputs in (self.state.get("inputs") or {}).values() for p in inputs["files"])
+        files = [Path(os.path.abspath(p)) for p in list(requirement_files) + list(input_files)]
+        return [self.venv_context.site_packages_folder, self.loader.config_file, self.state_manifest] + files
+
+    # Fast path is only possible if extensions don't need to be loaded on every init
+    # (i.e. if they don't declare any input value, and if their discovery is cached)
+    @property
+    def _fast_path_enabled(self) -> bool:
+        all_inputs = (self.state.get("inputs") or {}).values()
+        return all(inputs["values"] is None for inputs in all_inputs) and self._read_extensions_cache() is not None
+
+    # Generate fast path manifest, used by loading script to skip python when everything is already initialized
+    def _update_fast_path(self):
+        if not self._fast_path_enabled:
+            # Extensions need to be checked on every init: no manifest
+            self.fast_path_manifest.unlink(missing_ok=True)
+            return
+
+        # Paths in manifest are relative to project folder (absolute ones if outside of the project)
+        relative_venv_path = self._relative_venv_bin_path.parent
+
+        def relative_path(p: Path) -> str:
+            if p.is_relative_to(self.venv_path):
+                return to_linux_path(relative_venv_path / p.relative_to(self.venv_path))
+            if p.is_relative_to(self.project_path):
+                return to_linux_path(p.relative_to(self.project_path))
+            return to_linux_path(p)
+
+        # Stamp is the last modification time of all inputs
+        stamp = max((p.stat().st_mtime_ns for p in filter(lambda p: p.exists(), self._fast_path_inputs)), default=0)
+
+        self.renderer.render(
+            "fastpath.sh.jinja",
+            self.fast_path_manifest,
+            keywords={
+                "venvOK": relative_path(self.venv_path / VENV_OK),
+                "state": relative_path(self.state_manifest),
+                "inputs": [relative_path(p) for p in self._fast_path_inputs],
+                "stamp": stamp,
+                "runMode": self.loader.run_mode,
+            },
+        )
+
+    # Check if fast path manifest is up to date
+    def _check_fast_path(self) -> bool:
+        # Manifest must exist, and be newer than all inputs (or must not exist, if fast path is disabled)
+        return _is_up_to_date(self.fast_path_manifest, self._fast_path_inputs) or (not self.fast_path_manifest.exists() and not self._fast_path_enabled)
+
+    # Run activation scripts once, and capture environment changes as (operation, name, value) lists (None if activation failed)
+    def _capture_activation(self) -> Union[list[list[str]], None]:
+        import re
+
+        # Activation is captured from an environment which is not activated yet
+        env = {k: v for k, v in os.environ.items() if k not in _VENV_ENV_VARS}
+        env["PATH"] = os.pathsep.join(p for p in env.get("PATH", "").split(os.pathsep) if Path(p) != self.venv_bin_path)
+
+        # Dump environment before and after activation
+        script = f"env -0 && printf '%s\\0' {_SNAPSHOT_MARKER} && source .buildenv/activate.sh >/dev/null 2>&1 </dev/null && env -0"
+        try:
+            cp = profiler.run(["bash", "-c", script], cwd=self.project_path, env=env, capture_output=True, check=False)
+        except OSError as e:
+            logger.debug(f"Can't capture activation environment: {e}")
+            return None
+        dumps = cp.stdout.decode(errors="replace").split(f"{_SNAPSHOT_MARKER}\0")
+        if cp.returncode != 0 or len(dumps) != 2:
+            logger.debug(f"Can't capture activation environment (rc: {cp.returncode})")
+            return None
+        before, after = ({k: v for k, _, v in (e.partition("=") for e in d.split("\0") if len(e))} for d in dumps)
+
+        # Build environment changes
+        changes = []
+        for name in filter(lambda n: re.fullmatch("[A-Za-z_][A-Za-z0-9_]*", n) and n not in _SNAPSHOT_IGNORED_VARS, sorted(set(before) | set(after))):
+            old, new = before.get(name), after.get(name)
+            if new == old:
+                continue
+            if new is None:
+                changes.append(["unset", name, ""])
+            elif old and new.endswith(os.pathsep + old):
+                # Prepended path list item(s) (typically venv bin folder in PATH): keep current value at replay time
+                changes.append(["prepend", name, new[: -len(old)]])
+            elif old and new.startswith(old + os.pathsep):
+                changes.append(["append", name, new[len(old) :]])
+            else:
+                changes.append(["set", name, new])
+        return changes
+
+    # Concatenate activation scripts in a single bundle, sourced by venv activate script (if outdated)
+    def _update_activation_bundle(self):
+        folder = self.venv_context.activation_scripts_folder
+        scripts = sorted(folder.glob("*.sh"))
+        bundle = self.venv_context.activation_bundle
+        if not folder.is_dir() or _is_up_to_date(bundle, [folder] + scripts):
+            return
+        with profiler.phase("activation bundle"):
+            unsafe = list(filter(lambda s: not _is_bundle_safe(s), scripts))
+            if unsafe:
+                # Some script relies on being sourced on its own: no bundle, all scripts will be sourced one by one
+                logger.debug(f"Activation scripts not bundled (unsafe constructs in {', '.join(s.name for s in unsafe)})")
+                bundle.unlink(missing_ok=True)
+                return
+
+            # Written in a temporary file first, as the bundle may be sourced concurrently
+            temp_file = bundle.with_name(f"{bundle.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with temp_file.open("w", newline="\n") as f:
+                for script in scripts:
+                    f.write(f"# {script.name}\n{script.read_text().rstrip()}\n\n")
+            os.replace(temp_file, bundle)
+
+    # Refresh activation snapshot (if outdated, or forced)
+    def _update_activation_snapshot(self, force: bool = False):
+        if not force and _is_up_to_date(self.activation_snapshot, self.loader.activation_inputs(self.venv_bin_path)):
+            return
+        with profiler.phase("activation snapshot"):
+            # Shell commands to replay changes
+            changes = None if self.is_windows else self._capture_activation()
+            commands = [_replay_command(*change) for change in changes] if changes is not None else None
+            self.renderer.render("activate.env.sh.jinja", self.activation_snapshot, keywords={"changes": commands})
+
+            # Same changes, for python activation
+            snapshot_json = self.project_script_path / ACTIVATION_ENV
+            if changes is not None:
+                with snapshot_json.open("w") as f:
+                    json.dump({"changes": changes}, f, indent=4)
+            else:
+                snapshot_json.unlink(missing_ok=True)
+
+            # Always touch snapshot, so that it is newer than inputs (even if content didn't change)
+            self.activation_snapshot.touch()
 
     # Check for recommended git files, and display warning if they're missing
     def _verify_git_files(self):
@@ -176,22 +486,90 @@ class BuildEnvManager:
         return out
 
     # Clean extra activation files in venv
-    def _clean_activation_files(self):
+    def _clean_activation_files(self, existing_files: list[Path]):
         # Browse existing files (all but initial ones, i.e. those with a prefix greater than 00_)
-        for f in filter(lambda f: not f.name.startswith("00_"), self._existing_activation_files):
+        for f in filter(lambda f: not f.name.startswith("00_"), existing_files):
             f.unlink()
 
     # Add activation files in venv
     def _add_activation_files(self):
         # Iterate on required activation files
+        self._start_contribution(_BUILDENV_OWNER)
         for name, extensions, templates, keywords in [
             ("set_prompt", [".sh"], ["venv_prompt.sh.jinja"], None),
-            ("completion", [".sh"], ["completion.sh.jinja"], {"commands": list(self._completion_commands)}),
+            ("completion", [".sh"], ["completion.sh.jinja"], self._completion_code),
         ]:
             # Iterate on extensions and templates
             for extension, template in zip(extensions, templates):
                 # Add script to activation folder
                 self.add_activation_file(name, extension, template, keywords)
+        self._owner = None
+
+    # Extension currently contributing to the build environment, in the current thread
+    @property
+    def _owner(self) -> Union[str, None]:
+        return getattr(self._local, "owner", None)
+
+    @_owner.setter
+    def _owner(self, owner: Union[str, None]):
+        self._local.owner = owner
+
+    # Start recording contributions of an extension
+    def _start_contribution(self, owner: str):
+        self._owner = owner
+        self._contributions[owner] = {"activationFiles": [], "completion": [], "ignoredPatterns": []}
+
+    # Record contribution of the current extension (returns False if not invoked from an extension)
+    def _contribute(self, kind: str, value: str) -> bool:
+        if self._owner is None:
+            return False
+        self._contributions[self._owner][kind].append(value)
+        return True
+
+    # Completion code for registered commands and pip, generated once for all (and cached until commands or packages versions change)
+    @property
+    def _completion_code(self) -> dict[str, str]:
+        # Build cache key
+        versions = {}
+        for package in ["argcomplete", "pip"]:
+            try:
+                versions[package] = importlib.metadata.version(package)
+            except importlib.metadata.PackageNotFoundError:  # pragma: no cover
+                versions[package] = None
+        key = {"commands": sorted(self._completion_commands), "versions": versions}
+
+        # Check for cached code
+        cache_file = self.venv_script_path / COMPLETION_CACHE
+        try:
+            with cache_file.open() as f:
+                cache = json.load(f)
+            if cache["key"] == key:
+                return cache["code"]
+        except (OSError, ValueError, KeyError):
+            # Missing or corrupted cache
+            pass
+
+        # Generate argcomplete code for all registered commands
+        import argcomplete
+
+        code = {"argcompleteCode": argcomplete.shellcode(key["commands"])}
+
+        # Generate pip code, for each shell
+        pip_exe = self.venv_bin_path / ("pip.exe" if self.is_windows else "pip")
+        for shell in ["bash", "zsh"]:
+            try:
+                cp = profiler.run([str(pip_exe), "completion", f"--{shell}"], capture_output=True, check=True)
+                pip_code = cp.stdout.decode()
+            except (OSError, subprocess.CalledProcessError) as e:
+                logger.warning(f"Failed to generate pip completion for {shell}: {e}")
+                pip_code = ""
+            code[f"pip{shell.capitalize()}Code"] = pip_code.strip()
+
+        # Update cache
+        self.venv_script_path.mkdir(parents=True, exist_ok=True)
+        with cache_file.open("w") as f:
+            json.dump({"key": key, "code": code}, f, indent=4)
+        return code
 
     def register_completion(self, command: str):
         """
@@ -200,7 +578,8 @@ class BuildEnvManager:
 
         :param command: New command to be registered
         """
-        self._completion_commands.add(command)
+        if not self._contribute("completion", command):
+            self._completion_commands.add(command)
 
     def register_ignored_pattern(self, pattern: str):
         """
@@ -208,30 +587,53 @@ class BuildEnvManager:
 
         :param pattern: New pattern to be ignored
         """
-        self._ignored_patterns.append(pattern)
+        if not self._contribute("ignoredPatterns", pattern):
+            self._ignored_patterns.append(pattern)
 
     def add_activation_file(self, name: str, extension: str, template: str, keywords: dict[str, str] = None):
         """
         Add activation file in venv (in "<venv>/<bin or Script>/activate.d" folder).
         This file will be loaded each time the venv is activated.
 
+        When invoked from an extension init, the file is owned by this extension: it keeps its index (and is only replaced)
+        when the extension is initialized again, and it is removed if the extension doesn't add it anymore.
+        As extensions may be initialized concurrently, the file is only generated once all extensions are initialized
+        (in extensions order, so that indexes are allocated deterministically).
+
         :param name: Name of the activation script
         :param extension: Extension of the activation script
         :param template: Path to Jinja template file to be rendered for this script
         :param keyword: Map of keywords provided to template
         """
 
-        # Find next index for activation script
-        next_index = max(int(n.name[0:2]) for n in filter(lambda f: f.name.endswith(extension), self._existing_activation_files)) + 1
+        # Extension being initialized: defer generation
+        if self._owner in self._pending_files:
+            self._pending_files[self._owner].append((name, extension, template, keywords))
+            return
+
+        # Reuse index of the same script, if previously generated by the same extension
+        replaced_files = self._replaced_files.get(self._owner, [])
+        previous_name = next(filter(lambda f: f[3:] == f"{name}{extension}", replaced_files), None)
+        if previous_name is not None:
+            replaced_files.remove(previous_name)
+            script_name = self.venv_context.activation_scripts_folder / previous_name
+        else:
+            # Find next index for activation script
+            next_index = max(int(n.name[0:2]) for n in filter(lambda f: f.name.endswith(extension), self._existing_activation_files)) + 1
 
-        # Build script name
-        script_name = self.venv_context.activation_scripts_folder / f"{next_index:02}_{name}{extension}"
+            # Build script name
+            script_name = self.venv_context.activation_scripts_folder / f"{next_index:02}_{name}{extension}"
 
         # Generate from template
         self.renderer.render(template, script_name, keywords=keywords)
+        self._contribute("activationFiles", script_name.name)
 
-    # Iterate on entry points to load extensions
-    def _parse_extensions(self) -> dict[str, object]:
+        # Not invoked from init: refresh bundle now
+        if self._owner is None:
+            self._update_activation_bundle()
+
+    # Find entry points for extensions
+    def _extensions_entry_points(self) -> dict[str, object]:
         # Build entry points map (to handle duplicate names)
         unfiltered_entry_points = importlib.metadata.entry_points()
         all_entry_points = {}
@@ -244,6 +646,30 @@ class BuildEnvManager:
             # Python >=3.10
             for p in unfiltered_entry_points.select(group="buildenv_init"):
                 all_entry_points[p.name] = p
+        return all_entry_points
+
+    # Fingerprint of extension inputs: files content hashes, and values hash (None if no values)
+    def _inputs_fingerprint(self, extension: BuildEnvExtension) -> dict[str, object]:
+        files, values = {}, []
+        for item in extension.get_inputs():
+            if isinstance(item, Path):
+                path = item if item.is_absolute() else self.project_path / item
+                files[str(path)] = _file_hash(path)
+            else:
+                values.append(str(item))
+        return {"files": files, "values": hashlib.sha256(json.dumps(values).encode()).hexdigest() if len(values) else None}
+
+    # Check if inputs of initialized extensions are unchanged, without loading extensions
+    # (only possible if they don't declare any input value: values can only be computed by loaded extensions)
+    def _check_inputs(self) -> bool:
+        all_inputs = list((self.state.get("inputs") or {}).values())
+        if any(inputs["values"] is not None for inputs in all_inputs):
+            return False
+        return all(_file_hash(Path(p)) == h for inputs in all_inputs for p, h in inputs["files"].items())
+
+    # Iterate on entry points to load extensions
+    def _parse_extensions(self) -> dict[str, object]:
+        all_entry_points = self._extensions_entry_points()
 
         out = {}
         for name, point in all_entry_points.items():
@@ -256,51 +682,153 @@ class BuildEnvManager:
                 raise AssertionError(f"Failed to load {name} extension: {e}") from e
             out[name] = extension
 
+        # Remember discovered extensions and their versions
+        self._write_extensions_cache(all_entry_points, out)
         return out
 
-    # Check for persisted versions
-    def _check_versions(self, all_extensions: dict[str, object]) -> bool:
-        # Build map of version files
-        version_files = {self.buildenv_ok: __version__, self.project_buildenv_ok: __version__}
-        version_files.update({self.project_script_path / f"{n}OK": p.get_version() for n, p in all_extensions.items()})
-
-        # Verify that all persisted versions are in line
-        for v_file, v_str in version_files.items():
-            # If any file doesn't exist: give up
-            if not v_file.is_file():
-                return False
-
-            # Check version
-            with v_file.open() as f:
-                if f.read() != v_str:
-                    # Version mismatch: give up
-                    return False
-
-        # If we get here, all versions (buildenv + extensions) are OK
-        return True
-
-    # Iterate on extensions to delegate init
-    def _run_extensions(self, all_extensions: dict[str, object], force: bool):
-        # Iterate on entry points
-        for name, extension in all_extensions.items():
-            # Get initializer, and verify type
-            logger.info(f" - with {name} extension")
+    # Extensions discovery cache key: site-packages folders modification times + hashes of extensions distributions RECORD files
+    def _extensions_cache_key(self, records: list[str]) -> dict[str, dict[str, object]]:
+        return {
+            "folders": {p: os.stat(p).st_mtime_ns for p in filter(os.path.isdir, site.getsitepackages() + [site.getusersitepackages()])},
+            "records": {r: _file_hash(Path(r)) for r in records},
+        }
 
-            # Call init method
-            try:
-                extension.init(force)
-            except Exception as e:
-                raise AssertionError(f"Failed to execute {name} extension init: {e}") from e
+    # Read extensions versions from discovery cache (if still valid)
+    def _read_extensions_cache(self) -> Union[dict[str, str], None]:
+        try:
+            with (self.venv_script_path / EXTENSIONS_CACHE).open() as f:
+                cache = json.load(f)
+            if cache["key"] == self._extensions_cache_key(list(cache["key"]["records"].keys())):
+                return cache["extensions"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            # Missing or corrupted cache
+            pass
+        return None
+
+    # Write extensions discovery cache
+    def _write_extensions_cache(self, all_entry_points: dict[str, object], all_extensions: dict[str, BuildEnvExtension]):
+        cache_file = self.venv_script_path / EXTENSIONS_CACHE
+
+        # Find RECORD file of each extension distribution
+        records = []
+        for name, point in all_entry_points.items():
+            dist = getattr(point, "dist", None)
+            record = next((dist.locate_file(f) for f in (dist.files or []) if f.name == "RECORD"), None) if dist is not None else None
+            if record is None or _is_editable(dist) or not all_extensions[name].cacheable:
+                # Can't identify extension distribution (e.g. Python <3.10), editable distribution (sources may change without any
+                # modification in site-packages), or extension opting out: don't cache
+                cache_file.unlink(missing_ok=True)
+                return
+            records.append(str(record))
 
-            # Init ok: touch init file
-            init_file = self.project_script_path / f"{name}OK"
-            with init_file.open("w") as f:
-                f.write(extension.get_version())
+        # Persist cache
+        self.venv_script_path.mkdir(parents=True, exist_ok=True)
+        with cache_file.open("w") as f:
+            json.dump({"key": self._extensions_cache_key(records), "extensions": {n: e.get_version() for n, e in all_extensions.items()}}, f, indent=4)
 
-    # Just touch "buildenv ready" file
-    def _make_ready(self, tag_file: Path):
-        with tag_file.open("w") as f:
-            f.write(__version__)
+    @property
+    def state(self) -> dict[str, object]:
+        """
+        Build environment state, as persisted in the state manifest (empty if not initialized yet, or in an unknown format)
+        """
+        if self._state is None:
+            try:
+                with self.state_manifest.open() as f:
+                    self._state = json.load(f)
+                assert self._state["format"] == STATE_FORMAT
+            except (OSError, ValueError, KeyError, TypeError, AssertionError):
+                # Missing, corrupted or unknown state
+                self._state = {}
+        return self._state
+
+    # Atomically update state manifest (written in a temporary file, then renamed)
+    def _write_state(self, **updates):
+        state = dict(self.state)
+        state.update(updates, format=STATE_FORMAT)
+        if state == self.state:
+            return
+        self.project_script_path.mkdir(parents=True, exist_ok=True)
+        temp_file = self.state_manifest.with_name(f"{STATE_MANIFEST}.{os.getpid()}.tmp")
+        with temp_file.open("w") as f:
+            json.dump(state, f, indent=4)
+        os.replace(temp_file, self.state_manifest)
+        self._state = state
+
+    # Expected state for generated scripts (templates and requirement files are hashed only once)
+    @cached_property
+    def _scripts_state(self) -> dict[str, object]:
+        venv_ok = self.venv_path / VENV_OK
+        templates = sorted(filter(Path.is_file, (_MODULE_FOLDER / "templates").glob("*.jinja"))) + [_MODULE_FOLDER / "loader.py"]
+        requirement_files = filter(lambda p: p.is_relative_to(self.project_path), self.loader.requirement_inputs(self.venv_path))
+        return {
+            "buildenv": __version__,
+            "venv": str(self.venv_path.resolve()),
+            "venvStamp": venv_ok.stat().st_mtime_ns if venv_ok.is_file() else None,
+            "templates": hashlib.sha256(b"".join(p.name.encode() + b"\0" + p.read_bytes() for p in templates)).hexdigest()[:16],
+            "requirements": {str(p): _file_hash(p) for p in filter(Path.is_file, requirement_files)},
+        }
+
+    # Check if generated scripts are up to date
+    def _check_state(self) -> bool:
+        return all(self.state.get(k) == v for k, v in self._scripts_state.items())
+
+    # Check if build environment is up to date with these extensions versions
+    def _check_extensions(self, extensions_versions: dict[str, str]) -> bool:
+        return self._check_state() and self.state.get("extensions") == extensions_versions
+
+    # Delegate init to extensions (concurrently, unless they depend on each other)
+    def _run_extensions(self, all_extensions: dict[str, object], force: bool):
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+        # Dependencies between extensions to be initialized (other ones are either already initialized, or not installed)
+        waiting = {n: [d for d in e.dependencies if d in all_extensions and d != n] for n, e in all_extensions.items()}
+
+        # Check for circular dependencies
+        remaining = dict(waiting)
+        while len(remaining):
+            ready = [n for n, deps in remaining.items() if all(d not in remaining for d in deps)]
+            assert len(ready), f"Circular dependencies between extensions: {', '.join(remaining)}"
+            for name in ready:
+                del remaining[name]
+
+        def init_extension(name: str, extension: BuildEnvExtension):
+            self._start_contribution(name)
+            self._pending_files[name] = []
+            try:
+                with profiler.phase(f"extension: {name}"):
+                    extension.init(force)
+            finally:
+                self._owner = None
+
+        # Run inits as soon as their dependencies are initialized
+        errors = {}
+        running = {}
+        with ThreadPoolExecutor() as executor:
+            while len(waiting) or len(running):
+                for name in [n for n, deps in waiting.items() if all(d not in waiting and d not in running.values() for d in deps)]:
+                    failed = next(filter(lambda d: d in errors, waiting.pop(name)), None)
+                    if failed is not None:
+                        errors[name] = AssertionError(f"{failed} extension init failed")
+                    else:
+                        logger.info(f" - with {name} extension")
+                        running[executor.submit(init_extension, name, all_extensions[name])] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        errors[name] = future.exception()
+
+        # Report errors, per extension
+        if len(errors):
+            names = [n for n in all_extensions if n in errors]
+            raise AssertionError("\n".join(f"Failed to execute {n} extension init: {errors[n]}" for n in names)) from errors[names[0]]
+
+        # Generate activation files (in extensions order)
+        for name in all_extensions:
+            self._owner = name
+            for args in self._pending_files.pop(name):
+                self.add_activation_file(*args)
+        self._owner = None
 
     # Preliminary checks before env loading
     def _command_checks(self, command: str, options: Namespace):
@@ -334,8 +862,10 @@ class BuildEnvManager:
         """
         Verify that the context is OK to run a command, then:
 
-        * generates command script containing the command to be executed
-        * throws a specific return code so that loading script is told to execute the generated command script
+        * in **exec** run mode (with Linux loading script): throws a specific return code so that loading script is told to execute
+          the command arguments directly, in the activated environment
+        * otherwise: generates command script containing the command to be executed (named from the loading script run ID),
+          and throws a specific return code so that loading script is told to execute the generated command script
 
         :param options: Input command line parsed options
         """
@@ -346,31 +876,57 @@ class BuildEnvManager:
         # Verify command is not empty
         assert len(options.CMD) > 0, "no command provided"
 
-        # Find a script name
-        script_path = None
-        script_index = None
-        possible_indexes = list(range(_RC_RUN_CMD, _RC_MAX + 1))
-        while script_path is None:
-            # Candidate script name
-            candidate_index = random.choice(possible_indexes)
-            candidate_script = self.project_script_path / f"command.{candidate_index}.{options.from_loader}"
-
-            # Script not already used?
-            if not candidate_script.is_file():
-                script_path = candidate_script
-                script_index = candidate_index
-            else:
-                # Security to avoid infinite loop
-                # Command script is supposed to be deleted by loading script, but "just in case"...
-                # (e.g. launched command killed without giving a chance to remove the file)
-                possible_indexes.remove(candidate_index)
-                assert len(possible_indexes) > 0, "[internal] can't find any available command script number"
+        # Exec mode: nothing more to do than telling loading script to execute the command
+        # (only supported by Linux loading scripts which are recent enough to provide a run ID)
+        run_id = options.run_id if hasattr(options, "run_id") else None
+        if self.loader.run_mode == "exec" and options.from_loader == "sh" and run_id is not None:
+            raise RCHolder(RC_RUN_EXEC)
+
+        # Remove stale command scripts
+        self._clean_stale_commands()
+
+        if run_id is not None:
+            # Command script dedicated to this run ID
+            assert _RUN_ID_PATTERN.match(run_id) is not None, f"[internal] invalid run ID: {run_id}"
+            script_path = self.project_script_path / f"command.{run_id}.{options.from_loader}"
+            assert self._reserve_command(script_path), f"[internal] command script already exists for run ID {run_id}"
+            rc = RC_RUN_SCRIPT
+        else:
+            # Legacy loading script (no run ID): find a free script number, also used as return code
+            import random
+
+            possible_indexes = list(range(_RC_RUN_CMD, _RC_MAX + 1))
+            random.shuffle(possible_indexes)
+            rc = next(filter(lambda i: self._reserve_command(self.project_script_path / f"command.{i}.{options.from_loader}"), possible_indexes), None)
+            assert rc is not None, "[internal] can't find any available command script number"
+            script_path = self.project_script_path / f"command.{rc}.{options.from_loader}"
 
         # Generate command script
         self.renderer.render(f"command.{options.from_loader}.jinja", script_path, executable=True, keywords={"command": " ".join(options.CMD)})
 
-        # Tell loading script about command script ID
-        raise RCHolder(script_index)
+        # Tell loading script about command script
+        raise RCHolder(rc)
+
+    # Atomically create command script (returns False if it already exists)
+    def _reserve_command(self, script_path: Path) -> bool:
+        try:
+            with script_path.open("x"):
+                return True
+        except FileExistsError:
+            return False
+
+    # Remove command scripts left behind by killed loading scripts
+    # (and run ID reservation folders left behind by killed Windows loading scripts)
+    def _clean_stale_commands(self):
+        limit = time.time() - _STALE_COMMAND_DELAY
+        for pattern, remove in [("command.*", Path.unlink), ("run.*", Path.rmdir)]:
+            for path in self.project_script_path.glob(pattern):
+                try:
+                    if path.stat().st_mtime < limit:
+                        remove(path)
+                except OSError:
+                    # Already removed, or still in use
+                    pass
 
     def upgrade(self, options: Namespace):
         """
@@ -379,17 +935,10 @@ class BuildEnvManager:
         :param options: Input command line parsed options
         """
 
-        # Delegate upgrade to pip
+        # Delegate upgrade to installer
         eager = False if not hasattr(options, "eager") else options.eager
 
         # Iterate on packages to be installed (default ones + requirement files, if any)
         all_requirements = self.loader.requirement_files
         for to_install in [self.loader.default_packages] + ([[f"--requirement={req_file}" for req_file in all_requirements]] if len(all_requirements) else []):
-            subprocess.run(
-                [str(sys.executable), "-m", "pip", "install", "--upgrade"]
-                + (["--upgrade-strategy=eager"] if eager else [])  # Change upgrade strategy if specified
-                + to_install
-                + self.loader.pip_args.split(" "),
-                cwd=self.project_path,
-                check=True,
-            )
+            profiler.run(self.loader.install_command(Path(sys.executable), to_install, upgrade=True, eager=eager), cwd=self.project_path, check=True)
@@ -0,0 +1,60 @@
+"""
+Benchmarks for **buildenv** tool.
+
+Benchmarks are not part of the tests suite; they are launched as standalone modules from the **src** folder, e.g.:
+
+    python -m tests.benchmarks.bench_completion
+
+The **suite** module runs all the main use cases benchmarks, and stores results as JSON, to be compared between commits:
+
+    python -m tests.benchmarks.suite --compare ../out/benchmarks/<previous results>.json
+"""
+
+import statistics
+import time
+from typing import Callable
+
+
+def measure(func: Callable[[], object], repeat: int = 20, warmup: int = 2) -> dict[str, float]:
+    """
+    Measure wall time of a function
+
+    :param func: Function to be measured
+    :param repeat: Number of measured calls
+    :param warmup: Number of calls done before measuring (to warm up caches)
+    :return: Timings statistics (in milliseconds)
+    """
+
+    # Warm up
+    for _ in range(warmup):
+        func()
+
+    # Measure
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "repeat": repeat,
+    }
+
+
+def report(title: str, results: dict[str, dict[str, float]]):
+    """
+    Print timings statistics table
+
+    :param title: Benchmark title
+    :param results: Timings statistics per case
+    """
+
+    width = max(len(name) for name in results)
+    print(f"\n{title}\n")
+    print(f"{'case':<{width}}  {'min':>9}  {'median':>9}  {'mean':>9}  {'stdev':>9}")
+    for name, r in results.items():
+        print(f"{name:<{width}}  {r['min']:>7.1f}ms  {r['median']:>7.1f}ms  {r['mean']:>7.1f}ms  {r['stdev']:>7.1f}ms")
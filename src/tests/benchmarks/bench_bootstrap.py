@@ -0,0 +1,104 @@
+"""
+Venv bootstrap benchmark.
+
+Measures the wall time of a venv creation, in **twoPass** (default packages, then requirement files) and **singlePass** (everything resolved at once)
+bootstrap modes.
+
+To be reproducible (and runnable offline), packages are dummy wheels served from a local file-based index. Default packages are replaced by
+a set of "core" packages, and requirement file pins some of them to an older version (forcing a downgrade in two pass mode).
+
+Usage (from **src** folder, in buildenv venv):
+
+    python -m tests.benchmarks.bench_bootstrap
+"""
+
+import logging
+import tempfile
+import zipfile
+from pathlib import Path
+
+from buildenv.loader import BuildEnvLoader, logger
+from tests.benchmarks import measure, report
+
+# Dummy packages count
+CORE_PACKAGES = 5
+APP_PACKAGES = 20
+
+
+def make_wheel(index: Path, name: str, version: str, requires: list[str] = None):
+    """
+    Generate a dummy pure python wheel
+
+    :param index: Folder where to generate the wheel
+    :param name: Package name
+    :param version: Package version
+    :param requires: Package dependencies
+    """
+
+    dist_info = f"{name}-{version}.dist-info"
+    files = {
+        f"{name}/__init__.py": f'__version__ = "{version}"\n',
+        f"{dist_info}/METADATA": f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n" + "".join(f"Requires-Dist: {r}\n" for r in requires or []),
+        f"{dist_info}/WHEEL": "Wheel-Version: 1.0\nGenerator: bench\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+    }
+    with zipfile.ZipFile(index / f"{name}-{version}-py3-none-any.whl", "w") as z:
+        for path, content in files.items():
+            z.writestr(path, content)
+        z.writestr(f"{dist_info}/RECORD", "".join(f"{path},,\n" for path in files) + f"{dist_info}/RECORD,,\n")
+
+
+def make_index(root: Path) -> Path:
+    """
+    Generate a local packages index, with dummy core packages (two versions) and app packages (pinning core packages to the old version)
+
+    :param root: Folder where to create index
+    :return: Index path
+    """
+
+    index = root / "index"
+    index.mkdir()
+    for i in range(CORE_PACKAGES):
+        for version in ("1.0", "2.0"):
+            make_wheel(index, f"bench_core_{i}", version)
+    for i in range(APP_PACKAGES):
+        make_wheel(index, f"bench_app_{i}", "1.0", [f"bench_core_{i % CORE_PACKAGES}<2"])
+    return index
+
+
+class _BenchLoader(BuildEnvLoader):
+    # Loader installing dummy core packages instead of default ones
+    @property
+    def default_packages(self) -> list[str]:
+        return [f"bench_core_{i}" for i in range(CORE_PACKAGES)]
+
+
+def bootstrap(root: Path, index: Path, mode: str):
+    """
+    Create a venv in a new project folder
+
+    :param root: Folder where to create project
+    :param index: Local packages index
+    :param mode: Bootstrap mode
+    """
+
+    project = Path(tempfile.mkdtemp(dir=root))
+    with (project / "buildenv.cfg").open("w") as f:
+        f.write(f"[local]\nlookUp = false\nbootstrapMode = {mode}\npipInstallArgs = --quiet --no-index --find-links={index.as_posix()}\n")
+    with (project / "requirements.txt").open("w") as f:
+        f.write("".join(f"bench_app_{i}\n" for i in range(APP_PACKAGES)))
+    _BenchLoader(project).setup_venv()
+
+
+def main():
+    logger.setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        index = make_index(root)
+        report(
+            "Venv bootstrap",
+            {mode: measure(lambda mode=mode: bootstrap(root, index, mode), repeat=3, warmup=0) for mode in ("twoPass", "singlePass")},
+        )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
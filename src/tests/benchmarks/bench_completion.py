@@ -0,0 +1,57 @@
+"""
+Per-keystroke completion latency benchmark.
+
+Measures the time needed by the **buildenv** command to answer a completion request (i.e. what is spent each time TAB is pressed in a buildenv shell),
+compared to the python interpreter startup time.
+
+Usage (from **src** folder, in buildenv venv):
+
+    python -m tests.benchmarks.bench_completion
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from tests.benchmarks import measure, report
+
+
+def complete(project: Path, comp_line: str) -> list[str]:
+    """
+    Ask **buildenv** command for completion
+
+    :param project: Project folder, where completion is requested
+    :param comp_line: Command line being completed
+    :return: Completion candidates
+    """
+
+    out_file = project / "completion.out"
+    env = dict(os.environ)
+    env.update({"_ARGCOMPLETE": "1", "COMP_LINE": comp_line, "COMP_POINT": str(len(comp_line)), "_ARGCOMPLETE_STDOUT_FILENAME": str(out_file)})
+    subprocess.run([sys.executable, "-m", "buildenv"], cwd=project, env=env, check=True, capture_output=True)
+    with out_file.open() as f:
+        return f.read().split("\v")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        project = Path(tmp)
+
+        # Sanity check
+        candidates = complete(project, "buildenv ")
+        assert "init" in candidates, f"Unexpected completion candidates: {candidates}"
+
+        report(
+            "Completion latency",
+            {
+                "python startup": measure(lambda: subprocess.run([sys.executable, "-c", "pass"], check=True)),
+                "complete 'buildenv '": measure(lambda: complete(project, "buildenv ")),
+                "complete 'buildenv init --'": measure(lambda: complete(project, "buildenv init --")),
+            },
+        )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,234 @@
+"""
+Startup and setup benchmark suite.
+
+Measures the main **buildenv** use cases:
+
+- **buildenv --version** command startup (i.e. command line interface import time)
+- cold venv setup (from a local file-based index)
+- warm loading script (**buildenv.sh init**, with an existing venv)
+- **buildenv.sh run true** round-trip
+- **buildenv init --force**
+- extensions discovery, with N fake extensions (with and without discovery cache)
+- templates rendering throughput
+
+Results are stored as JSON (in **out/benchmarks** folder by default), and can be compared with a previous run.
+
+Usage (from **src** folder, in buildenv venv):
+
+    python -m tests.benchmarks.suite [--case CASE]* [--output FILE] [--compare FILE]
+"""
+
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import Callable
+
+from buildenv.loader import VENV_OK, BuildEnvLoader, _MyEnvBuilder, logger
+from tests.benchmarks import measure, report
+from tests.benchmarks.bench_bootstrap import bootstrap, make_index
+
+# Default results folder
+OUTPUT_FOLDER = Path(__file__).parents[3] / "out" / "benchmarks"
+
+# Fake extensions count
+EXTENSIONS_COUNT = 20
+
+
+def make_project(root: Path) -> Path:
+    """
+    Prepare an initialized project, with a venv reusing packages from the current environment
+
+    :param root: Folder where to create project
+    :return: Project path
+    """
+
+    project = root / "project"
+    project.mkdir()
+    with (project / "buildenv.cfg").open("w") as f:
+        f.write("[local]\nlookUp = false\n")
+
+    # Lightweight venv: current environment packages are visible through a .pth file
+    venv = BuildEnvLoader(project).venv_path
+    _MyEnvBuilder(symlinks=os.name != "nt", with_pip=False).create(venv)
+    context = BuildEnvLoader(project)._get_context(venv)
+    with (context.site_packages_folder / "_bench.pth").open("w") as f:
+        f.write("\n".join(p for p in sys.path if p and Path(p).is_dir()) + "\n")
+    (venv / VENV_OK).touch()
+
+    # Generate loading scripts
+    subprocess.run([str(context.executable), "-m", "buildenv", "init"], cwd=project, check=True, capture_output=True)
+    return project
+
+
+def make_extensions(root: Path, count: int) -> Path:
+    """
+    Generate fake extensions distributions
+
+    :param root: Folder where to generate distributions
+    :param count: Number of extensions
+    :return: Folder to be added to **sys.path**
+    """
+
+    folder = root / "extensions"
+    folder.mkdir()
+    for i in range(count):
+        name = f"bench_ext_{i}"
+        with (folder / f"{name}.py").open("w") as f:
+            f.write(
+                "from buildenv import BuildEnvExtension\n\n\n"
+                + "class Extension(BuildEnvExtension):\n"
+                + "    def init(self, force: bool):\n        pass\n\n"
+                + "    def get_version(self) -> str:\n        return '1.0'\n"
+            )
+        dist_info = folder / f"{name}-1.0.dist-info"
+        dist_info.mkdir()
+        (dist_info / "METADATA").write_text(f"Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n")
+        (dist_info / "entry_points.txt").write_text(f"[buildenv_init]\n{name} = {name}:Extension\n")
+        (dist_info / "RECORD").write_text(f"{name}.py,,\n{name}-1.0.dist-info/RECORD,,\n")
+    return folder
+
+
+def run_script(project: Path, *args: str):
+    """
+    Run loading script in project
+
+    :param project: Project path
+    :param args: Loading script arguments
+    """
+    env = {k: v for k, v in os.environ.items() if k != "VIRTUAL_ENV"}
+    subprocess.run([str(project / "buildenv.sh")] + list(args), cwd=project, env=env, check=True, capture_output=True)
+
+
+def case_version(root: Path) -> dict[str, float]:
+    # Command line interface startup
+    return measure(lambda: subprocess.run([sys.executable, "-m", "buildenv", "--version"], cwd=root, check=True, capture_output=True))
+
+
+def case_cold_setup(root: Path) -> dict[str, float]:
+    # Cold venv setup, from local index
+    index = make_index(root)
+    return measure(lambda: bootstrap(root, index, "twoPass"), repeat=3, warmup=0)
+
+
+def case_warm_loader(root: Path) -> dict[str, float]:
+    # Loading script, with an existing venv
+    project = make_project(root)
+    return measure(lambda: run_script(project, "init"), repeat=10)
+
+
+def case_run(root: Path) -> dict[str, float]:
+    # Run a command in build environment
+    project = make_project(root)
+    return measure(lambda: run_script(project, "run", "true"), repeat=10)
+
+
+def case_init_force(root: Path) -> dict[str, float]:
+    # Forced init (in process)
+    from buildenv.manager import BuildEnvManager
+
+    project = make_project(root)
+    context = BuildEnvLoader(project)._get_context(BuildEnvLoader(project).venv_path)
+    m = BuildEnvManager(project, context.bin_folder)
+    return measure(lambda: m.init(Namespace(force=True)), repeat=10)
+
+
+def case_extensions(root: Path, cached: bool) -> dict[str, float]:
+    # Extensions discovery (with or without cache)
+    import importlib
+
+    from buildenv.manager import BuildEnvManager
+
+    project = make_project(root)
+    folder = make_extensions(root, EXTENSIONS_COUNT)
+    sys.path.insert(0, str(folder))
+    importlib.invalidate_caches()
+    try:
+        context = BuildEnvLoader(project)._get_context(BuildEnvLoader(project).venv_path)
+        m = BuildEnvManager(project, context.bin_folder)
+        assert len(m._parse_extensions()) >= EXTENSIONS_COUNT
+        return measure(m._read_extensions_cache if cached else m._parse_extensions)
+    finally:
+        sys.path.remove(str(folder))
+
+
+def case_render(root: Path) -> dict[str, float]:
+    # Render a template (compiled template is cached)
+    from buildenv.manager import BuildEnvManager
+
+    project = make_project(root)
+    context = BuildEnvLoader(project)._get_context(BuildEnvLoader(project).venv_path)
+    m = BuildEnvManager(project, context.bin_folder)
+    target = root / "rendered.sh"
+    return measure(lambda: m.renderer.render("activate.sh.jinja", target), repeat=200, warmup=10)
+
+
+# All benchmark cases
+CASES: dict[str, Callable[[Path], dict[str, float]]] = {
+    "version": case_version,
+    "cold_setup": case_cold_setup,
+    "warm_loader": case_warm_loader,
+    "run_true": case_run,
+    "init_force": case_init_force,
+    "extensions_discovery": lambda root: case_extensions(root, False),
+    "extensions_cached": lambda root: case_extensions(root, True),
+    "render": case_render,
+}
+
+
+def compare(base: dict, results: dict[str, dict[str, float]]):
+    """
+    Print comparison of median timings with previous results
+
+    :param base: Previous results (as stored in JSON file)
+    :param results: New results
+    """
+
+    width = max(len(name) for name in results)
+    print(f"\nComparison with {base.get('commit', '?')}\n")
+    print(f"{'case':<{width}}  {'base':>9}  {'new':>9}  {'delta':>7}")
+    for name, r in results.items():
+        if name in base["results"]:
+            old = base["results"][name]["median"]
+            print(f"{name:<{width}}  {old:>7.1f}ms  {r['median']:>7.1f}ms  {(r['median'] - old) * 100 / old:>+6.1f}%")
+
+
+def main(args: list[str] = None):
+    parser = ArgumentParser(description="buildenv benchmark suite")
+    parser.add_argument("--case", action="append", choices=list(CASES.keys()), help="case to be run (default: all)")
+    parser.add_argument("--output", type=Path, default=None, help="results JSON file (default: in out/benchmarks folder)")
+    parser.add_argument("--compare", type=Path, default=None, help="previous results JSON file to compare with")
+    options = parser.parse_args(args)
+    logger.setLevel(logging.ERROR)
+
+    # Run cases, each in its own folder
+    results = {}
+    for name in options.case or CASES.keys():
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"Running {name}...")
+            results[name] = CASES[name](Path(tmp))
+    report("Benchmark suite", results)
+
+    # Store results
+    cp = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, check=False, cwd=Path(__file__).parent)
+    commit = cp.stdout.decode().strip() if cp.returncode == 0 else "unknown"
+    output = options.output or OUTPUT_FOLDER / f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with output.open("w") as f:
+        json.dump({"commit": commit, "python": platform.python_version(), "platform": platform.platform(), "results": results}, f, indent=4)
+    print(f"\nResults stored in {output}")
+
+    # Compare with previous results
+    if options.compare is not None:
+        with options.compare.open() as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -3,7 +3,9 @@ import os
 import shutil
 import subprocess
 import sys
+import time
 from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
@@ -16,7 +18,9 @@ class TestFunctional(BuildEnvTestHelper):
     def check_generated_buildenv(self, buildenv: Path):
         exts = ["cmd", "sh"] if is_windows() else ["sh"]
         dot_buildenv = buildenv / ".buildenv"
-        expected = [dot_buildenv / f"{n}.{e}" for n in ["shell", "activate"] for e in exts] + [dot_buildenv / "buildenvOK"]
+        expected = [dot_buildenv / f"{n}.{e}" for n in ["shell", "activate"] for e in exts] + [
+            dot_buildenv / n for n in ["state.json", "venv.json", "fastpath.sh", "activate.env.sh"] + ([] if is_windows() else ["activate.env.json"])
+        ]
         logging.info(f"expected files: {expected}")
         found = list(filter(lambda f: f.is_file(), dot_buildenv.glob("*")))
         logging.info(f"found files: {found}")
@@ -85,11 +89,51 @@ class TestFunctional(BuildEnvTestHelper):
         # Check for generated files (generated run script shall be removed by loading script)
         self.check_generated_buildenv(buildenv)
 
+        if not is_windows():
+            # Run again without python loader: shall work through fast path
+            tmp_loader = tgt_loader.with_suffix(".tmp")
+            tgt_loader.rename(tmp_loader)
+            cp = subprocess.run(args, cwd=buildenv, check=False, capture_output=True, env=new_env)
+            tmp_loader.rename(tgt_loader)
+            assert cp.returncode == 0, f"Buildenv fast path run failed: {cp.returncode}"
+            assert "hello from buildenv" in cp.stdout.decode().splitlines()
+
+            # Stress test: many concurrent run commands in the same project, through the loading script
+            # (fast path is disabled by config and requirement files being newer than its manifest: all commands go through the loader)
+            future = time.time() + 3600
+            for f in ("buildenv.cfg", "requirements.txt"):
+                os.utime(buildenv / f, (future, future))
+            count = 500
+
+            def run_concurrent(i: int) -> tuple[int, list[str]]:
+                cp = subprocess.run([str(buildenv / "buildenv.sh"), "run", "echo", f"run {i}"], cwd=buildenv, check=False, capture_output=True, env=new_env)
+                return cp.returncode, cp.stdout.decode().splitlines()
+
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                results = list(executor.map(run_concurrent, range(count)))
+            for i, (rc, output) in enumerate(results):
+                assert rc == 0, f"Concurrent run {i} failed: {rc}"
+                assert f"run {i}" in output
+            assert len(list((buildenv / ".buildenv").glob("command.*"))) == 0
+            for f in ("buildenv.cfg", "requirements.txt"):
+                os.utime(buildenv / f)
+
         # Check for return code propagation
         args = ["cmd", "/c", f"{buildenv / 'buildenv.cmd'} run exit /b 74"] if is_windows() else [f"{buildenv / 'buildenv.sh'}", "run", "exit", "74"]
         cp = subprocess.run(args, cwd=buildenv, check=False, capture_output=True, env=new_env)
         assert cp.returncode == 74
 
+        if not is_windows():
+            # Switch to exec run mode: arguments and return code are forwarded as is
+            self.prepare_config("buildenv-dontLookUp+exec.cfg", buildenv)
+            for _ in range(2):  # Second time through fast path
+                cp = subprocess.run(
+                    args[:2] + ["sh", "-c", 'echo "$1"; exit 101', "sh", "hello  from exec"], cwd=buildenv, check=False, capture_output=True, env=new_env
+                )
+                assert cp.returncode == 101
+                assert cp.stdout.decode().splitlines() == ["hello  from exec"]
+                assert len(list((buildenv / ".buildenv").glob("command.*"))) == 0
+
         # Copy config to disable git look up and configure bad python
         self.prepare_config("buildenv-dontLookUp+badPython.cfg", buildenv)
 
@@ -1,11 +1,18 @@
+import ensurepip
+import json
+import os
 import re
+import shutil
 import subprocess
+import sys
+import time
 from pathlib import Path
 
 import pytest
 from nmk.utils import is_windows
 
-from buildenv.loader import VENV_OK, BuildEnvLoader
+import buildenv
+from buildenv.loader import ACTIVATION_BUNDLE, ACTIVATION_ENV, VENV_OK, BuildEnvLoader, EnvContext, _MyEnvBuilder
 from tests.commons import BuildEnvTestHelper
 
 # Expected bin folder in venv
@@ -111,6 +118,69 @@ class TestBuildEnvLoader(BuildEnvTestHelper):
         v = loader.find_venv()
         assert v == fake_venv
 
+    def test_loader_find_venv_index(self, monkeypatch):
+        received_commands = []
+
+        def fake_subprocess(args, capture_output, cwd, check):
+            received_commands.append(" ".join(args))
+            return subprocess.CompletedProcess(args, 0, str(cwd).encode())
+
+        # Patch subprocess to fake git answer --> returns parent path and rc 0
+        monkeypatch.setattr(subprocess, "run", fake_subprocess)
+
+        # Prepare parent venv + child project
+        parent_venv = self.test_folder / "venv"
+        parent_venv.mkdir()
+        (parent_venv / VENV_OK).touch()
+        project = self.test_folder / "child"
+        project.mkdir()
+
+        # First look up: git is invoked, and index is written
+        loader = BuildEnvLoader(project)
+        assert loader.find_venv() == parent_venv
+        assert len(received_commands) == 2
+        assert loader.venv_index.is_file()
+
+        # Second look up: resolved from index, without any git call
+        received_commands.clear()
+        assert BuildEnvLoader(project).find_venv() == parent_venv
+        assert len(received_commands) == 0
+
+        # Change a config file: index is stale, git is invoked again
+        self.prepare_config("buildenv-dontLookUp.cfg", project)
+        assert BuildEnvLoader(project).find_venv() is None
+        assert len(received_commands) == 0
+        (project / "buildenv.cfg").unlink()
+        assert BuildEnvLoader(project).find_venv() == parent_venv
+        assert len(received_commands) == 0
+
+        # Project copied with its index: index is ignored
+        received_commands.clear()
+        copy = self.test_folder / "copy"
+        shutil.copytree(project, copy)
+        assert BuildEnvLoader(copy).find_venv() == parent_venv
+        assert len(received_commands) > 0
+        assert BuildEnvLoader(project).find_venv() == parent_venv
+
+        # Project venv created: index is stale
+        received_commands.clear()
+        (project / "venv").mkdir()
+        (project / "venv" / VENV_OK).touch()
+        assert BuildEnvLoader(project).find_venv() == project / "venv"
+        assert len(received_commands) > 0
+        shutil.rmtree(project / "venv")
+
+        # Remove venv tag: index is stale
+        received_commands.clear()
+        (parent_venv / VENV_OK).unlink()
+        assert BuildEnvLoader(project).find_venv() is None
+        assert len(received_commands) > 0
+
+        # Corrupted index is ignored
+        with loader.venv_index.open("w") as f:
+            f.write("{")
+        assert BuildEnvLoader(project).find_venv() is None
+
     def check_strings(self, received_list: list[str], expected_list: list[str]):
         # Check used commands
         for received, expected in zip(
@@ -193,6 +263,527 @@ class TestBuildEnvLoader(BuildEnvTestHelper):
         # Check with existing (but corrupted) venv folder
         self.check_venv_creation(monkeypatch, True, False)
 
+    def test_setup_venv_create_uv(self, monkeypatch):
+        received_commands = []
+
+        def fake_subprocess(args, cwd=None, **kwargs):
+            received_commands.append(" ".join(args))
+            return subprocess.CompletedProcess(args, 1 if args[0] == "git" else 0, b"")
+
+        # Patch subprocess + fake uv availability
+        monkeypatch.setattr(subprocess, "run", fake_subprocess)
+        monkeypatch.setattr(shutil, "which", lambda name: f"/usr/bin/{name}")
+
+        # Create venv with uv installer
+        self.prepare_config("buildenv-uv.cfg")
+        (self.test_folder / "requirements.txt").touch()
+        loader = BuildEnvLoader(self.test_folder)
+        assert loader.installer == "uv"
+        loader.setup_venv()
+
+        # No ensurepip, and all installs delegated to uv
+        self.check_strings(
+            received_commands,
+            [
+                "git rev-parse --show-toplevel",
+                f"uv pip install --python {self.venv_exe} --upgrade pip wheel setuptools buildenv<2 --no-cache",
+                f"uv pip install --python {self.venv_exe} --requirement=requirements.txt --no-cache",
+            ],
+        )
+        assert len(received_commands) == 3
+        assert (self.test_folder / "venv" / "venvOK").is_file()
+
+    def check_single_pass(self, monkeypatch, pip_version: str, pip_upgrade: bool):
+        received_commands = []
+
+        def fake_subprocess(args, cwd=None, **kwargs):
+            received_commands.append(" ".join(args))
+            return subprocess.CompletedProcess(args, 1 if args[0] == "git" else 0, b"")
+
+        # Patch subprocess + bundled pip version
+        monkeypatch.setattr(subprocess, "run", fake_subprocess)
+        monkeypatch.setattr(ensurepip, "version", lambda: pip_version)
+
+        # Create venv in single pass mode
+        self.prepare_config("buildenv-single-pass.cfg")
+        (self.test_folder / "requirements.txt").touch()
+        BuildEnvLoader(self.test_folder).setup_venv()
+
+        # Pip is upgraded first only if too old, then everything is installed at once
+        self.check_strings(
+            received_commands,
+            [
+                "git rev-parse --show-toplevel",
+                f"{self.venv_exe} -I?m ensurepip --upgrade --default-pip",
+            ]
+            + ([f"{self.venv_exe} -m pip install --upgrade pip --require-virtualenv"] if pip_upgrade else [])
+            + [f"{self.venv_exe} -m pip install --upgrade pip wheel setuptools buildenv<2 --requirement=requirements.txt --require-virtualenv"],
+        )
+        assert len(received_commands) == (4 if pip_upgrade else 3)
+
+    def test_setup_venv_create_single_pass(self, monkeypatch):
+        # Recent bundled pip: no upgrade
+        self.check_single_pass(monkeypatch, "23.2.1", False)
+
+    def test_setup_venv_create_single_pass_old_pip(self, monkeypatch):
+        # Old bundled pip: upgraded first
+        self.check_single_pass(monkeypatch, "21.3.1", True)
+
+    def test_bad_bootstrap_mode(self):
+        # Unknown bootstrap mode
+        self.prepare_config("buildenv-bad-bootstrap.cfg")
+        loader = BuildEnvLoader(self.test_folder)
+        try:
+            _ = loader.bootstrap_mode
+            raise AssertionError("Should not getting here")
+        except AssertionError as e:
+            assert "Unknown bootstrap mode: foo" in str(e)
+
+    def test_bad_run_mode(self):
+        # Unknown run mode
+        self.prepare_config("buildenv-bad-run-mode.cfg")
+        loader = BuildEnvLoader(self.test_folder)
+        try:
+            _ = loader.run_mode
+            raise AssertionError("Should not getting here")
+        except AssertionError as e:
+            assert "Unknown run mode: foo" in str(e)
+
+    def test_setup_venv_wheelhouse(self, monkeypatch):
+        received_commands = []
+        wheelhouse = self.test_folder / "wheelhouse"
+        site_packages = []
+        wheel_rc = [1]
+
+        def fake_subprocess(args, cwd=None, **kwargs):
+            received_commands.append(" ".join(args))
+            if args[1:4] == ["-m", "pip", "install"]:
+                # Fake installed packages (including a local one)
+                for name in ["used_pkg", "new_pkg", "local_pkg"]:
+                    (site_packages[0] / f"{name}-1.0.dist-info").mkdir(parents=True, exist_ok=True)
+                (site_packages[0] / "local_pkg-1.0.dist-info" / "direct_url.json").write_text('{"url": "file:///some/project"}')
+            if args[1:4] == ["-m", "pip", "wheel"]:
+                # Fake built packages (+ first build fails)
+                if wheel_rc[0]:
+                    with (wheelhouse / "new_pkg-1.0-py3-none-any.whl").open("wb") as f:
+                        f.write(b"0" * 400 * 1024)
+                return subprocess.CompletedProcess(args, wheel_rc[0], b"")
+            return subprocess.CompletedProcess(args, 1 if args[0] == "git" else 0, b"")
+
+        # Patch subprocess
+        monkeypatch.setattr(subprocess, "run", fake_subprocess)
+
+        # Prepare wheelhouse with old wheels
+        self.prepare_config("buildenv-wheelhouse.cfg")
+        wheelhouse.mkdir()
+        for name in ["used_pkg", "old_pkg"]:
+            wheel = wheelhouse / f"{name}-1.0-py3-none-any.whl"
+            with wheel.open("wb") as f:
+                f.write(b"0" * 400 * 1024)
+            os.utime(wheel, (0, 0))
+
+        # Create venv
+        loader = BuildEnvLoader(self.test_folder)
+        site_packages.append(EnvContext(_MyEnvBuilder().ensure_directories(self.test_folder / "venv")).site_packages_folder)
+        loader.setup_venv()
+
+        # Wheelhouse is used for install, then updated with missing wheels only (pinned, and local packages are skipped)
+        wheelhouse_exp = self.wrap_exe(wheelhouse.as_posix())
+        self.check_strings(
+            received_commands[2:],
+            [
+                f"{self.venv_exe} -m pip install --upgrade pip wheel setuptools buildenv<2 --find-links={wheelhouse_exp} --require-virtualenv",
+                f"{self.venv_exe} -m pip wheel --quiet --no-deps --wheel-dir={wheelhouse_exp} --find-links={wheelhouse_exp} new_pkg==1.0",
+            ],
+        )
+
+        # Least recently used wheel was evicted
+        assert sorted(w.name for w in wheelhouse.glob("*.whl")) == ["new_pkg-1.0-py3-none-any.whl", "used_pkg-1.0-py3-none-any.whl"]
+
+        # Create venv again: all installed packages already have wheels, nothing to build
+        shutil.rmtree(self.test_folder / "venv")
+        received_commands.clear()
+        BuildEnvLoader(self.test_folder).setup_venv()
+        assert not any(" wheel --quiet " in c for c in received_commands)
+
+        # Create venv again, with empty wheelhouse
+        shutil.rmtree(self.test_folder / "venv")
+        shutil.rmtree(wheelhouse)
+        wheel_rc[0] = 0
+        received_commands.clear()
+        BuildEnvLoader(self.test_folder).setup_venv()
+        assert [c for c in received_commands if " wheel --quiet " in c][0].endswith(" new_pkg==1.0 used_pkg==1.0")
+        assert wheelhouse.is_dir()
+        assert len(list(wheelhouse.glob("*.whl"))) == 0
+
+    @pytest.mark.skipif(is_windows(), reason="symbolic links may not be allowed on Windows")
+    def test_setup_venv_store(self, monkeypatch):
+        received_commands = []
+        monkeypatch.setattr(subprocess, "run", lambda args, **kwargs: received_commands.append(" ".join(args)) or subprocess.CompletedProcess(args, 0, b""))
+
+        # Prepare 3 projects sharing the same store (2 of them with same requirements)
+        store = self.test_folder / "store"
+        old_value = self.set_env("BUILDENV_TEST_STORE", str(store))
+        try:
+            projects = []
+            for name, requirements in [("a", "foo"), ("b", "foo"), ("c", "bar")]:
+                project = self.test_folder / name
+                project.mkdir()
+                self.prepare_config("buildenv-store.cfg", project)
+                (project / "requirements.txt").write_text(requirements)
+                projects.append(project)
+
+            # First project: venv is created in store, and linked
+            BuildEnvLoader(projects[0]).setup_venv()
+            key = BuildEnvLoader(projects[0]).venv_key
+            assert (projects[0] / "venv").is_symlink()
+            assert (projects[0] / "venv").resolve() == (store / key).resolve()
+            assert (store / key / VENV_OK).is_file()
+            assert not (store / f"{key}.lock").exists()
+            assert len([c for c in received_commands if " install " in c]) == 2
+
+            # Second project: same key, venv is reused (even if a corrupted local one exists)
+            received_commands.clear()
+            (projects[1] / "venv").mkdir()
+            (projects[1] / "venv" / "fake_file").touch()
+            c = BuildEnvLoader(projects[1]).setup_venv()
+            assert BuildEnvLoader(projects[1]).venv_key == key
+            assert (projects[1] / "venv").resolve() == (store / key).resolve()
+            assert c.root == projects[1] / "venv"
+            assert len([c for c in received_commands if " install " in c]) == 0
+            with (store / key / ".buildenv" / "store.json").open() as f:
+                assert json.load(f) == [str(p / "venv") for p in projects[0:2]]
+
+            # Third project: other key, while entry is being created by someone else --> local venv
+            other_key = BuildEnvLoader(projects[2]).venv_key
+            assert other_key != key
+            (store / f"{other_key}.lock").touch()
+            BuildEnvLoader(projects[2]).setup_venv()
+            assert (projects[2] / "venv").is_dir() and not (projects[2] / "venv").is_symlink()
+            (store / f"{other_key}.lock").unlink()
+
+            # Link fails --> local venv
+            shutil.rmtree(projects[2] / "venv")
+            real_symlink = os.symlink
+
+            def fake_symlink(src, dst, target_is_directory=False):
+                if target_is_directory:
+                    raise OSError("not allowed")
+                real_symlink(src, dst)
+
+            monkeypatch.setattr(os, "symlink", fake_symlink)
+            BuildEnvLoader(projects[2]).setup_venv()
+            assert (projects[2] / "venv").is_dir() and not (projects[2] / "venv").is_symlink()
+            assert (store / other_key / VENV_OK).is_file()
+            monkeypatch.undo()
+            monkeypatch.setattr(subprocess, "run", lambda args, **kwargs: subprocess.CompletedProcess(args, 0, b""))
+
+            # First entry is not used anymore --> garbage collected on next link (even with a stale lock left by a killed process)
+            # Other folders in store are kept
+            for p in projects[0:2]:
+                (p / "venv").unlink()
+            shutil.rmtree(projects[2] / "venv")
+            (store / "my-tool-venv").mkdir()
+            (store / "my-tool-venv" / "data.txt").touch()
+            (store / f"{key}.lock").touch()
+            os.utime(store / f"{key}.lock", (time.time() - 2 * 3600,) * 2)
+            BuildEnvLoader(projects[2]).setup_venv()
+            assert (projects[2] / "venv").is_symlink()
+            assert (store / other_key).is_dir()
+            assert not (store / key).exists()
+            assert not (store / f"{key}.lock").exists()
+            assert (store / "my-tool-venv" / "data.txt").is_file()
+
+            # Entry being linked by another process: not garbage collected
+            (projects[2] / "venv").unlink()
+            (store / f"{other_key}.lock").touch()
+            BuildEnvLoader(projects[0]).setup_venv()
+            assert (store / other_key).is_dir()
+
+            # Created entry locked by another process: wait for it to be released
+            (projects[0] / "venv").unlink()
+            with monkeypatch.context() as m:
+                m.setattr(time, "sleep", lambda _: (store / f"{other_key}.lock").unlink())
+                BuildEnvLoader(projects[2]).setup_venv()
+            assert (projects[2] / "venv").is_symlink()
+
+            # Broken link is replaced
+            shutil.rmtree(store / other_key)
+            BuildEnvLoader(projects[2]).setup_venv()
+            assert (projects[2] / "venv" / VENV_OK).is_file()
+
+            # Used entries are kept
+            BuildEnvLoader(projects[0]).setup_venv()
+            assert (store / key).is_dir()
+            assert (store / other_key).is_dir()
+
+            # Requirements changed: linked to another entry
+            (projects[0] / "requirements.txt").write_text("foo2")
+            BuildEnvLoader(projects[0]).setup_venv()
+            new_key = BuildEnvLoader(projects[0]).venv_key
+            assert new_key not in (key, other_key)
+            assert (projects[0] / "venv").resolve() == (store / new_key).resolve()
+
+            # Constraints files are part of the key (through their content)
+            def project_key(project: Path, requirements: str, constraints: str) -> str:
+                (project / "requirements.txt").write_text(requirements)
+                (project / "constraints.txt").write_text(constraints)
+                return BuildEnvLoader(project).venv_key
+
+            constrained_key = project_key(projects[1], "foo\n-c constraints.txt\n", "foo<2\n")
+            assert constrained_key != key
+            assert project_key(projects[2], "foo\n-c constraints.txt\n", "foo<2\n") == constrained_key
+            assert project_key(projects[2], "foo\n-c constraints.txt\n", "foo<3\n") != constrained_key
+
+            # Local requirements: key is specific to the project
+            assert project_key(projects[1], "-e .\n", "") != project_key(projects[2], "-e .\n", "")
+        finally:
+            self.restore_env("BUILDENV_TEST_STORE", old_value)
+
+    @pytest.mark.skipif(is_windows(), reason="venv template is not supported on Windows")
+    def test_setup_venv_template(self, monkeypatch):
+        received_commands = []
+        monkeypatch.setattr(subprocess, "run", lambda args, **kwargs: received_commands.append(" ".join(args)) or subprocess.CompletedProcess(args, 1, b""))
+
+        # Prepare template venv, with some installed package and script
+        template = self.test_folder / "template"
+        template.mkdir()
+        t = BuildEnvLoader(template).setup_venv()
+        (t.site_packages_folder / "foo").mkdir()
+        (t.site_packages_folder / "foo" / "__init__.py").write_text("foo")
+        (t.bin_folder / "foo").write_text(f"#!{t.executable}\nimport foo\n")
+        (t.bin_folder / "foo").chmod(0o755)
+        (t.bin_folder / "foo.bin").write_bytes(b"\0foo")
+        (t.bin_folder / ACTIVATION_BUNDLE).write_text(f"source {t.bin_folder}/activate.d/00_activate.sh\n")
+
+        # Create venv from template
+        project = self.test_folder / "project"
+        project.mkdir()
+        self.prepare_config("buildenv-template.cfg", project)
+        received_commands.clear()
+        c = BuildEnvLoader(project).setup_venv()
+        assert (c.root / VENV_OK).is_file()
+
+        # Packages are shared, scripts are updated
+        assert (c.site_packages_folder / "foo" / "__init__.py").stat().st_ino == (t.site_packages_folder / "foo" / "__init__.py").stat().st_ino
+        assert (c.bin_folder / "foo").read_text() == f"#!{c.executable}\nimport foo\n"
+        assert os.access(c.bin_folder / "foo", os.X_OK)
+        assert (c.bin_folder / "foo.bin").read_bytes() == b"\0foo"
+        assert not (c.bin_folder / ACTIVATION_BUNDLE).exists()
+        assert (c.bin_folder / "activate.d" / "00_activate.sh").is_file()
+        assert str(project) in (c.bin_folder / "activate.d" / "00_activate.sh").read_text()
+
+        # No ensurepip, but packages (delta) are installed
+        assert not any("ensurepip" in cmd for cmd in received_commands)
+        assert any(" install " in cmd for cmd in received_commands)
+
+        # Packages can't be linked: copied instead
+        shutil.rmtree(c.root)
+        monkeypatch.setattr(os, "link", lambda src, dst: (_ for _ in ()).throw(OSError("cross-device link")))
+        c = BuildEnvLoader(project).setup_venv()
+        assert (c.site_packages_folder / "foo" / "__init__.py").stat().st_ino != (t.site_packages_folder / "foo" / "__init__.py").stat().st_ino
+        assert (c.site_packages_folder / "foo" / "__init__.py").read_text() == "foo"
+
+    def test_setup_venv_bad_template(self, monkeypatch):
+        received_commands = []
+        monkeypatch.setattr(subprocess, "run", lambda args, **kwargs: received_commands.append(" ".join(args)) or subprocess.CompletedProcess(args, 1, b""))
+        project = self.test_folder / "project"
+        project.mkdir()
+        self.prepare_config("buildenv-template.cfg", project)
+        template = self.test_folder / "template" / "venv"
+
+        # Missing template
+        assert BuildEnvLoader(project).venv_template is None
+
+        # Template without pyvenv.cfg
+        template.mkdir(parents=True)
+        (template / VENV_OK).touch()
+        assert BuildEnvLoader(project).venv_template is None
+
+        # Template with other python version
+        (template / "pyvenv.cfg").write_text("home = /usr/bin\nversion = 2.7.18\n")
+        assert BuildEnvLoader(project).venv_template is None
+
+        # Valid template
+        (template / "pyvenv.cfg").write_text(f"home = /usr/bin\nversion = {sys.version_info.major}.{sys.version_info.minor}.0\n")
+        assert BuildEnvLoader(project).venv_template == project / ".." / "template" / "venv"
+
+    def test_sync_requirements(self, monkeypatch):
+        received_commands = []
+        delta_content = []
+        delta_file = self.test_folder / ".buildenv" / f"requirements-delta.{os.getpid()}.txt"
+
+        def fake_subprocess(args, cwd=None, **kwargs):
+            received_commands.append(" ".join(args))
+            if f"--requirement={delta_file}" in args:
+                delta_content.append(delta_file.read_text().splitlines())
+            return subprocess.CompletedProcess(args, 1 if args[0] == "git" else 0, b"")
+
+        monkeypatch.setattr(subprocess, "run", fake_subprocess)
+
+        def update(path: Path, content: str):
+            # Update file, with a different modification time
+            mtime = path.stat().st_mtime_ns if path.is_file() else 0
+            path.write_text(content)
+            os.utime(path, ns=(mtime + 1000, mtime + 1000))
+
+        def setup() -> list[str]:
+            received_commands.clear()
+            delta_content.clear()
+            BuildEnvLoader(self.test_folder).setup_venv()
+            return [c for c in received_commands if " install " in c]
+
+        # Create venv with nested requirements and constraints
+        (self.test_folder / "sub").mkdir()
+        constraints = self.test_folder / "sub" / "constraints.txt"
+        update(self.test_folder / "requirements.txt", "foo\n-r sub/req2.txt\n# some comment\nbar  # inline comment\n")
+        update(self.test_folder / "sub" / "req2.txt", "baz \\\n  >=1.0\n--constraint=constraints.txt\n-e .\n")
+        update(constraints, "foo<2\n")
+        assert len(setup()) == 2
+        with (self.test_folder / "venv" / "requirements.json").open() as f:
+            fingerprint = json.load(f)[str(self.test_folder)]
+        assert len(fingerprint["files"]) == 3
+        constraint_entry = fingerprint["entries"][2]
+        assert constraint_entry.startswith(f"--constraint={constraints}  # ")
+        assert fingerprint["entries"] == ["foo", "baz   >=1.0", constraint_entry, "-e .", "bar"]
+        assert BuildEnvLoader(self.test_folder).requirement_inputs(self.test_folder / "venv") == [
+            self.test_folder / "requirements.txt",
+            self.test_folder / "sub" / "req2.txt",
+            constraints,
+        ]
+
+        # Nothing changed: nothing installed
+        assert setup() == []
+
+        # Nested requirement modified: only delta is installed
+        update(self.test_folder / "sub" / "req2.txt", "baz>=2.0\nqux\n--constraint=constraints.txt\n-e .\n")
+        commands = setup()
+        assert len(commands) == 1
+        self.check_strings(commands, [f"{self.venv_exe} -m pip install --requirement={self.wrap_exe(delta_file.as_posix())} --require-virtualenv"])
+        assert delta_content == [[constraint_entry, "baz>=2.0", "qux"]]
+        assert not delta_file.exists()
+
+        # Requirements being synced by another process: wait for it to release the lock
+        lock = self.test_folder / "venv" / "requirements.json.lock"
+        lock.touch()
+        waits = []
+        monkeypatch.setattr(time, "sleep", lambda d: waits.append(d) or lock.unlink(missing_ok=True))
+        update(self.test_folder / "sub" / "req2.txt", "baz>=2.0\nqux\nquux\n--constraint=constraints.txt\n-e .\n")
+        assert len(setup()) == 1
+        assert len(waits) == 1
+        assert delta_content == [[constraint_entry, "quux"]]
+        assert not lock.exists()
+        update(self.test_folder / "sub" / "req2.txt", "baz>=2.0\nqux\n--constraint=constraints.txt\n-e .\n")
+        assert setup() == []
+
+        # Constraints modified: all requirements are installed again
+        update(constraints, "foo<3\n")
+        assert len(setup()) == 1
+        assert delta_content[0][1:] == ["foo", "baz>=2.0", "qux", "-e .", "bar"]
+
+        # Touched file or removed requirement: nothing installed
+        update(self.test_folder / "requirements.txt", "foo\n-r sub/req2.txt\n-r requirements.txt\n-r missing.txt\n")
+        assert setup() == []
+        assert setup() == []
+
+        # New requirements file
+        update(self.test_folder / "requirements-dev.txt", "pytest\n")
+        assert len(setup()) == 1
+        assert delta_content[0][0].startswith(f"--constraint={constraints}  # ")
+        assert delta_content[0][1:] == ["pytest"]
+
+        # Venv created by older version (no fingerprint): fingerprint is only recorded
+        (self.test_folder / "venv" / "requirements.json").unlink()
+        update(self.test_folder / "requirements-dev.txt", "pytest\npytest-cov\n")
+        assert setup() == []
+        assert (self.test_folder / "venv" / "requirements.json").is_file()
+
+        # Relative path options in nested file: made absolute in delta file (if path exists)
+        (self.test_folder / "sub" / "wheels").mkdir()
+        update(self.test_folder / "sub" / "req2.txt", "baz>=2.0\nqux\n--constraint=constraints.txt\n-e .\n--find-links=wheels\n-f missing\n")
+        assert len(setup()) == 1
+        assert delta_content[0][1:3] == [f"--find-links {(self.test_folder / 'sub' / 'wheels').resolve()}", "-f missing"]
+
+    def test_installer_fallback(self, monkeypatch):
+        # uv not found: fallback to pip
+        monkeypatch.setattr(shutil, "which", lambda name: None)
+        self.prepare_config("buildenv-uv.cfg")
+        assert BuildEnvLoader(self.test_folder).installer == "pip"
+
+        # Unknown installer
+        self.prepare_config("buildenv-bad-installer.cfg")
+        try:
+            _ = BuildEnvLoader(self.test_folder).installer
+            raise AssertionError("Should not getting here")
+        except AssertionError as e:
+            assert "Unknown installer: foo" in str(e)
+
+    def test_activate(self, monkeypatch):
+        # Environment restored after test
+        for name in ["PATH", "PYTHONHOME", "BUILDENV_TEST_UNSET"]:
+            monkeypatch.setenv(name, os.environ.get(name, "foo"))
+        for name in ["VIRTUAL_ENV", "BUILDENV_TEST_SET", "BUILDENV_TEST_APPEND"]:
+            monkeypatch.delenv(name, raising=False)
+        monkeypatch.setattr(sys, "path", list(sys.path))
+        self.prepare_config("buildenv-dontLookUp.cfg")
+
+        # No venv yet
+        try:
+            buildenv.activate(self.test_folder)
+            raise AssertionError("Should not getting here")
+        except AssertionError as e:
+            assert "No build environment found" in str(e)
+
+        # Fake venv, with activation snapshot
+        venv = self.test_folder / "venv"
+        venv.mkdir()
+        (venv / VENV_OK).touch()
+        (venv / "pyvenv.cfg").write_text("version = 2.7.18\n")
+        try:
+            buildenv.activate(self.test_folder)
+            raise AssertionError("Should not getting here")
+        except AssertionError as e:
+            assert "doesn't match with current python version" in str(e)
+        (venv / "pyvenv.cfg").write_text(f"version = {sys.version_info[0]}.{sys.version_info[1]}.0\n")
+        context = BuildEnvLoader(self.test_folder)._get_context(venv)
+        (context.bin_folder / "activate.d").mkdir()
+        (context.bin_folder / "activate.d" / "00_activate.sh").touch()
+        snapshot = self.test_folder / ".buildenv" / ACTIVATION_ENV
+        snapshot.parent.mkdir(exist_ok=True)
+        changes = [
+            ["prepend", "PATH", os.pathsep.join([str(self.test_folder / "extra"), str(context.bin_folder), ""])],
+            ["unset", "BUILDENV_TEST_UNSET", ""],
+            ["set", "BUILDENV_TEST_SET", "foo"],
+            ["append", "BUILDENV_TEST_APPEND", ":bar"],
+        ]
+        with snapshot.open("w") as f:
+            json.dump({"changes": changes}, f)
+
+        # Activate (twice: changes are applied only once)
+        for _ in range(2):
+            env = buildenv.activate(str(self.test_folder))
+            assert env == dict(os.environ)
+            assert env["VIRTUAL_ENV"] == str(venv)
+            assert env["PATH"].startswith(os.pathsep.join([str(self.test_folder / "extra"), str(context.bin_folder), ""]))
+            assert env["PATH"].count(str(context.bin_folder)) == 1
+            assert "PYTHONHOME" not in env
+            assert "BUILDENV_TEST_UNSET" not in env
+            assert env["BUILDENV_TEST_SET"] == "foo"
+            assert env["BUILDENV_TEST_APPEND"] == ":bar"
+            assert sys.path.count(str(context.site_packages_folder)) == 1
+
+        # Outdated snapshot: not applied
+        os.utime(context.bin_folder / "activate.d" / "00_activate.sh", ns=(snapshot.stat().st_mtime_ns + 10**9,) * 2)
+        monkeypatch.delenv("BUILDENV_TEST_SET")
+        monkeypatch.chdir(self.test_folder)
+        env = buildenv.activate()
+        assert "BUILDENV_TEST_SET" not in env
+        assert env["VIRTUAL_ENV"] == str(venv)
+
+        # No snapshot: basic activation only
+        snapshot.unlink()
+        assert buildenv.activate()["VIRTUAL_ENV"] == str(venv)
+
     def test_setup_with_manager(self, monkeypatch):
         received_commands = []
 
@@ -1,4 +1,6 @@
 import importlib.metadata
+import json
+import os
 import shutil
 import subprocess
 import sys
@@ -6,12 +8,15 @@ import tempfile
 from argparse import Namespace
 from pathlib import Path
 
+import pytest
+from jinja2 import TemplateNotFound
 from nmk.utils import is_windows
 from nmk_vscode.buildenv import BuildEnvInit as VsCodeInit
 
 from buildenv import BuildEnvExtension, BuildEnvLoader, BuildEnvManager
 from buildenv._internal.parser import RCHolder
-from buildenv.manager import BUILDENV_OK
+from buildenv.loader import ACTIVATION_ENV, to_linux_path
+from buildenv.manager import STATE_FORMAT, STATE_MANIFEST
 from tests.commons import VENV_BIN, BuildEnvTestHelper
 
 # Default (empty) namespace
@@ -37,6 +42,19 @@ class TestBuildEnvManager(BuildEnvTestHelper):
         assert m.project_script_path == self.test_folder / ".buildenv"
         assert m.is_windows == is_windows()
 
+    @pytest.mark.skipif(is_windows(), reason="symbolic links may not be allowed on Windows")
+    def test_attributes_linked_venv(self):
+        # Venv linked to a store entry
+        entry = self.test_folder / "store" / "1234"
+        (entry / VENV_BIN).mkdir(parents=True)
+        project = self.test_folder / "project"
+        project.mkdir()
+        os.symlink(entry, project / "venv", target_is_directory=True)
+        m = BuildEnvManager(project, project / "venv" / VENV_BIN)
+        assert m.is_project_venv
+        assert m.renderer.relative_venv_bin_path == Path("venv") / VENV_BIN
+        assert "venv" in m._ignored_patterns
+
     def check_manager(
         self,
         monkeypatch,
@@ -84,7 +102,7 @@ class TestBuildEnvManager(BuildEnvTestHelper):
         m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
         m.is_windows = with_windows  # Force windows files behavior
         generated_buildenv_files = [
-            self.test_folder / "venv" / BUILDENV_OK,
+            self.test_folder / ".buildenv" / STATE_MANIFEST,
             self.test_folder / "venv" / VENV_BIN / "activate.d" / "01_set_prompt.sh",
             self.test_folder / "venv" / VENV_BIN / "activate.d" / "02_completion.sh",
         ] + (
@@ -103,7 +121,7 @@ class TestBuildEnvManager(BuildEnvTestHelper):
                 self.test_folder / "buildenv.cmd",
                 activate_sh,
                 self.test_folder / ".buildenv" / "shell.sh",
-                self.test_folder / ".buildenv" / "buildenvOK",
+                self.test_folder / ".buildenv" / "fastpath.sh",
             ]
             + ([activate_cmd, self.test_folder / ".buildenv" / "shell.cmd"] if with_windows else [])
         )
@@ -137,7 +155,7 @@ class TestBuildEnvManager(BuildEnvTestHelper):
 
                 # Verify activate.sh file content
                 with activate_sh.open() as f:
-                    lines = [line.strip("\r\n") for line in f.readlines()]
+                    lines = [line.strip() for line in f.readlines()]
                 assert f"source venv/{VENV_BIN}/activate" in lines
 
                 # Verify activate.cmd file content
@@ -163,6 +181,215 @@ class TestBuildEnvManager(BuildEnvTestHelper):
 
         self.check_manager(monkeypatch, "init", False, True, git_update_index_rc=0)
 
+    def test_state(self, monkeypatch):
+        # Init: state manifest is written (atomically)
+        self.check_manager(monkeypatch, "init", check_files=False)
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        assert m.state["format"] == STATE_FORMAT
+        assert m.state["venv"] == str((self.test_folder / "venv").resolve())
+        assert "nmk-vscode" in m.state["extensions"]
+        assert [f.name for f in m.project_script_path.glob(f"{STATE_MANIFEST}*")] == [STATE_MANIFEST]
+        assert m._check_state()
+
+        # Unchanged state: not written again
+        state_time = m.state_manifest.stat().st_mtime_ns
+        m.init(Namespace(force=True))
+        assert m.state_manifest.stat().st_mtime_ns == state_time
+
+        # Venv was created again: extensions are initialized again
+        os.utime(m.venv_path / "venvOK", ns=(state_time + 10**9,) * 2)
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        assert not m._check_state()
+        m._update_scripts(True)
+        assert m._check_state()
+        assert m.state["extensions"] is None
+        m.init()
+        assert "nmk-vscode" in m.state["extensions"]
+
+        # Corrupted or unknown state: init again
+        for content in ["{", json.dumps({"format": STATE_FORMAT + 1})]:
+            m.state_manifest.write_text(content)
+            m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+            assert m.state == {}
+            m.init()
+            assert m._check_state()
+
+    def test_fast_path(self, monkeypatch):
+        # Init
+        self.check_manager(monkeypatch, "init", check_files=False)
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        assert m._check_fast_path()
+
+        # Verify manifest content
+        with m.fast_path_manifest.open() as f:
+            lines = [line.strip("\r\n") for line in f.readlines()]
+        assert '_BUILDENV_FAST_VENV_OK="venv/venvOK"' in lines
+        assert f'_BUILDENV_FAST_STATE=".buildenv/{STATE_MANIFEST}"' in lines
+
+        # Modify config file: manifest is outdated
+        self.prepare_config("buildenv-dontLookUp.cfg")
+        manifest_time = m.fast_path_manifest.stat().st_mtime_ns
+        os.utime(m.loader.config_file, ns=(manifest_time + 1000, manifest_time + 1000))
+        assert not m._check_fast_path()
+
+        # Init again: manifest is regenerated
+        m.init()
+        assert m._check_fast_path()
+
+        # Requirement files are also inputs
+        (self.test_folder / "requirements.txt").write_text("foo\n")
+        m.loader._write_requirements_fingerprint(m.venv_path, *m.loader._requirements_fingerprint())
+        assert (self.test_folder / "requirements.txt") in m._fast_path_inputs
+        m.init()
+        lines = m.fast_path_manifest.read_text().splitlines()
+        assert any(line.startswith("_BUILDENV_FAST_INPUTS=") and "requirements.txt" in line for line in lines)
+
+        # Requirement files outside of the project are recorded with their absolute path
+        shared_req = self.test_folder.parent / f"{self.test_folder.name}-shared.txt"
+        shared_req.write_text("foo\n")
+        (self.test_folder / "requirements.txt").write_text(f"-r ../{shared_req.name}\n")
+        m.loader._write_requirements_fingerprint(m.venv_path, *m.loader._requirements_fingerprint())
+        assert shared_req in m._fast_path_inputs
+        assert (self.test_folder / "requirements.txt") in m._fast_path_inputs
+        m.init()
+        lines = m.fast_path_manifest.read_text().splitlines()
+        assert any(line.startswith("_BUILDENV_FAST_INPUTS=") and f"{to_linux_path(shared_req)} " in line for line in lines)
+        (self.test_folder / "requirements.txt").write_text("foo\n")
+        m.loader._write_requirements_fingerprint(m.venv_path, *m.loader._requirements_fingerprint())
+        shared_req.unlink()
+        m.init()
+
+        # Touched requirement file: state is still valid (content is hashed), unlike with modified content
+        req_time = (self.test_folder / "requirements.txt").stat().st_mtime_ns
+        os.utime(self.test_folder / "requirements.txt", ns=(req_time + 10**9,) * 2)
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        assert m._check_state()
+        (self.test_folder / "requirements.txt").write_text("bar\n")
+        assert m._check_state()  # Expected state is only computed once (until next init)
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        assert not m._check_state()
+        m.init()
+
+        # Remove manifest: regenerated on next init
+        m.fast_path_manifest.unlink()
+        assert not m._check_fast_path()
+        m.init()
+        assert m._check_fast_path()
+
+        # Extensions discovery is not cached: manifest is removed
+        with monkeypatch.context() as mp:
+            mp.setattr(BuildEnvManager, "_read_extensions_cache", lambda _s: None)
+            manifest_time = m.fast_path_manifest.stat().st_mtime_ns
+            os.utime(m.loader.config_file, ns=(manifest_time + 1000,) * 2)
+            m.init()
+            assert not m.fast_path_manifest.exists()
+            assert m._check_fast_path()
+        assert not m._check_fast_path()
+        m.init()
+        assert m._check_fast_path()
+
+    def test_completion(self, monkeypatch):
+        # Init
+        self.check_manager(monkeypatch, "init", check_files=False)
+        completion = self.test_folder / "venv" / VENV_BIN / "activate.d" / "02_completion.sh"
+        with completion.open() as f:
+            content = f.read()
+        assert "register-python-argcomplete" not in content
+        assert "compdef _python_argcomplete buildenv" in content
+
+        # Code is reused from cache when commands didn't change
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        m.register_completion("nmk")  # Registered by nmk extension
+        monkeypatch.setattr(subprocess, "run", lambda *args, **kwargs: (_ for _ in ()).throw(AssertionError("unexpected subprocess")))
+        code = m._completion_code
+        assert "buildenv" in code["argcompleteCode"]
+
+        # Code is regenerated when a new command is registered
+        received_commands = []
+
+        def fake_subprocess(args, **kwargs):
+            received_commands.append(" ".join(args))
+            return subprocess.CompletedProcess(args, 0, b"# pip completion")
+
+        monkeypatch.setattr(subprocess, "run", fake_subprocess)
+        m.register_completion("foo")
+        code = m._completion_code
+        assert "compdef _python_argcomplete buildenv foo nmk" in code["argcompleteCode"]
+        assert code["pipBashCode"] == "# pip completion"
+        assert len(received_commands) == 2
+
+    def test_templates_cache(self, monkeypatch):
+        # Init: compiled templates are cached in venv
+        self.check_manager(monkeypatch, "init", check_files=False)
+        cache_folder = self.test_folder / "venv" / ".buildenv" / "templates"
+        assert len(list(cache_folder.glob("__jinja2_*.cache"))) > 0
+
+        # Environment is shared between renderers
+        m1 = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        m2 = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        assert m1.renderer.environment is m2.renderer.environment
+
+        # Render contributed template
+        template = self.test_folder / "foo.jinja"
+        target = self.test_folder / "foo.txt"
+        with template.open("w") as f:
+            f.write("foo {{ venvName }}")
+        m1.renderer.render(template, target)
+        with target.open() as f:
+            assert f.read() == "foo venv\n\n"
+
+        # Update template: modification is detected
+        with template.open("w") as f:
+            f.write("bar {{ venvName }}")
+        mtime = template.stat().st_mtime_ns + 1000
+        os.utime(template, ns=(mtime, mtime))
+        m2.renderer.render(str(template), target)
+        with target.open() as f:
+            assert f.read() == "bar venv\n\n"
+
+        # Unknown template
+        try:
+            m1.renderer.render(self.test_folder / "unknown.jinja", target)
+            raise AssertionError("Shouldn't get here")
+        except TemplateNotFound:
+            pass
+
+    def test_render_unchanged(self, monkeypatch):
+        # Init
+        self.check_manager(monkeypatch, "init", check_files=False)
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        m.renderer.flush_git_chmod()
+
+        # Render again: unchanged files are not written
+        received_commands = []
+        monkeypatch.setattr(subprocess, "run", lambda args, **kwargs: received_commands.append(args) or subprocess.CompletedProcess(args, 0, b""))
+        generated = [self.test_folder / "buildenv.sh", self.test_folder / "buildenv.cmd", self.test_folder / ".buildenv" / "activate.sh"]
+        mtimes = [p.stat().st_mtime_ns for p in generated]
+        template = self.test_folder / "foo.jinja"
+        with template.open("w") as f:
+            f.write("foo")
+        m.renderer.render(template, self.test_folder / "foo.sh", executable=True)
+        m.init(Namespace(force=True))
+        assert [p.stat().st_mtime_ns for p in generated] == mtimes
+
+        # Same size but different content: file is written
+        with generated[0].open("r+") as f:
+            f.write("#!/bin/sh")
+        m.init(Namespace(force=True))
+        assert generated[0].stat().st_mtime_ns != mtimes[0]
+        assert generated[0].read_text().startswith("#!/usr/bin/bash")
+
+        # Different size: file is written
+        with generated[2].open("a") as f:
+            f.write("foo")
+        m.init(Namespace(force=True))
+        assert not generated[2].read_text().endswith("foo")
+
+        # Git chmod is done in a single command
+        chmods = [c for c in received_commands if c[:2] == ["git", "update-index"]]
+        assert chmods[0] == ["git", "update-index", "--chmod=+x", "foo.sh", "buildenv.sh"]
+        assert all(c == ["git", "update-index", "--chmod=+x", "buildenv.sh"] for c in chmods[1:])
+
     def test_init_invalid_venv(self):
         venv_bin = self.test_folder / "venv" / "fakeBin"
         venv_bin.mkdir(parents=True, exist_ok=True)
@@ -219,13 +446,18 @@ class TestBuildEnvManager(BuildEnvTestHelper):
         # Patch entry points iteration
         monkeypatch.setattr(importlib.metadata, "entry_points", lambda: FakeEntryPoints([FakeEntryPoint()]))
 
+        # Extensions discovery cache is always valid (fake entry point has no distribution)
+        monkeypatch.setattr(BuildEnvManager, "_read_extensions_cache", lambda _s: {"foo": "1.2.3"})
+
         # Trigger init
         self.check_manager(monkeypatch, "init")
 
         # Check we gone through init method
         assert init_passed
-        v_file = self.test_folder / ".buildenv" / "fooOK"
-        assert v_file.is_file()
+        state_file = self.test_folder / ".buildenv" / STATE_MANIFEST
+        with state_file.open() as f:
+            state = json.load(f)
+        assert state["extensions"] == {"foo": "1.2.3"}
 
         # Trigger init again
         init_passed = False
@@ -237,9 +469,10 @@ class TestBuildEnvManager(BuildEnvTestHelper):
         self.check_manager(monkeypatch, "init", check_files=False, options=Namespace(force=True))
         assert init_passed
 
-        # Fake version in persisted file
-        with v_file.open("w") as f:
-            f.write("0.0.0")
+        # Fake version in persisted state
+        state["extensions"]["foo"] = "0.0.0"
+        with state_file.open("w") as f:
+            json.dump(state, f)
 
         # Trigger init again with bad version
         init_passed = False
@@ -254,6 +487,275 @@ class TestBuildEnvManager(BuildEnvTestHelper):
             expected_files += ["00_activate.bat"]
         assert len(expected_files) == len(activate_files)
 
+    def test_extension_incremental(self, monkeypatch):
+        init_calls = []
+        versions = {"foo": "1.0", "bar": "1.0"}
+        scripts = {"foo": ["foo"], "bar": ["bar"]}
+
+        # Fake extensions, contributing activation scripts and completion
+        def fake_extension(ext_name: str):
+            class FakeExtension(BuildEnvExtension):
+                def get_version(self) -> str:
+                    return versions[ext_name]
+
+                def init(self, force: bool):
+                    init_calls.append(ext_name)
+                    self.manager.register_completion(f"{ext_name}-cmd")
+                    for script in scripts[ext_name]:
+                        self.manager.add_activation_file(script, ".sh", "venv_prompt.sh.jinja")
+
+            class FakeEntryPoint:
+                name = ext_name
+
+                def load(self):
+                    return FakeExtension
+
+            return FakeEntryPoint()
+
+        entry_points = [fake_extension("foo"), fake_extension("bar")]
+        monkeypatch.setattr(importlib.metadata, "entry_points", lambda: FakeEntryPoints(entry_points))
+
+        # First init: all extensions are initialized
+        self.check_manager(monkeypatch, "init", check_files=False)
+        venv_activate = self.test_folder / "venv" / VENV_BIN / "activate.d"
+        assert init_calls == ["foo", "bar"]
+        assert {f.name for f in venv_activate.glob("*.sh")} == {"00_activate.sh", "01_foo.sh", "02_bar.sh", "03_set_prompt.sh", "04_completion.sh"}
+        foo_time = (venv_activate / "01_foo.sh").stat().st_mtime_ns
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        assert m.state["contributions"]["foo"] == {"activationFiles": ["01_foo.sh"], "completion": ["foo-cmd"], "ignoredPatterns": []}
+
+        # Bump bar version, with a new script: only bar is initialized again, and its script keeps its index
+        init_calls.clear()
+        versions["bar"] = "2.0"
+        scripts["bar"] = ["bar", "bar_extra"]
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        m.init()
+        assert init_calls == ["bar"]
+        assert {f.name for f in venv_activate.glob("*.sh")} == {
+            "00_activate.sh",
+            "01_foo.sh",
+            "02_bar.sh",
+            "03_set_prompt.sh",
+            "04_completion.sh",
+            "05_bar_extra.sh",
+        }
+        assert (venv_activate / "01_foo.sh").stat().st_mtime_ns == foo_time
+        assert m._completion_commands == {"buildenv", "foo-cmd", "bar-cmd"}
+
+        # Bump bar version again, without extra script: bar extra script is removed
+        init_calls.clear()
+        versions["bar"] = "3.0"
+        scripts["bar"] = ["bar"]
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        m.init()
+        assert init_calls == ["bar"]
+        assert not (venv_activate / "05_bar_extra.sh").is_file()
+
+        # Remove bar extension: its script is removed, and nothing is initialized again
+        init_calls.clear()
+        entry_points.pop()
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        m.init()
+        assert init_calls == []
+        assert {f.name for f in venv_activate.glob("*.sh")} == {"00_activate.sh", "01_foo.sh", "03_set_prompt.sh", "04_completion.sh"}
+        assert set(m.state["contributions"]) == {"foo", "buildenv"}
+
+    def test_extension_inputs(self, monkeypatch):
+        init_calls = []
+        values = []
+
+        # Fake extension, with input file and values
+        class FakeExtension(BuildEnvExtension):
+            def get_version(self) -> str:
+                return "1.0"
+
+            def get_inputs(self) -> list:
+                return [Path("ext.cfg")] + values
+
+            def init(self, force: bool):
+                init_calls.append(force)
+
+        class FakeEntryPoint:
+            name = "foo"
+
+            def load(self):
+                return FakeExtension
+
+        monkeypatch.setattr(importlib.metadata, "entry_points", lambda: FakeEntryPoints([FakeEntryPoint()]))
+        input_file = self.test_folder / "ext.cfg"
+
+        # Extensions discovery cache is always valid
+        monkeypatch.setattr(BuildEnvManager, "_read_extensions_cache", lambda _s: {"foo": "1.0"})
+
+        # First init: inputs fingerprint is recorded (missing file)
+        self.check_manager(monkeypatch, "init", check_files=False)
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        assert m.state["inputs"]["foo"] == {"files": {str(input_file): None}, "values": None}
+        assert m._check_inputs()
+        assert input_file in m._fast_path_inputs
+        assert m.fast_path_manifest.is_file()
+
+        # Init again: nothing changed
+        m.init()
+        assert init_calls == [False]
+
+        # Create input file: init again
+        input_file.write_text("a=1\n")
+        assert not m._check_inputs()
+        m.init()
+        assert init_calls == [False, False]
+        assert m._check_inputs()
+
+        # Touch input file (same content): nothing changed
+        os.utime(input_file, ns=(input_file.stat().st_mtime_ns + 10**9,) * 2)
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        m.init()
+        assert init_calls == [False, False]
+
+        # Declared input value: extensions are always loaded to check it
+        values.append("foo")
+        m.init(Namespace(force=True))
+        assert init_calls == [False, False, True]
+        assert not m._check_inputs()
+        assert not m.fast_path_manifest.exists()
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        m.init()
+        assert init_calls == [False, False, True]
+
+        # Change input value: init again (even with a valid discovery cache)
+        values[0] = "bar"
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        m.init()
+        assert init_calls == [False, False, True, False]
+
+    def test_extension_dependencies(self, monkeypatch):
+        init_calls = []
+        dependencies = {"a": ["b", "unknown"], "b": [], "c": []}
+        errors = {}
+
+        # Fake extensions, with dependencies
+        def fake_extension(ext_name: str):
+            class FakeExtension(BuildEnvExtension):
+                def get_version(self) -> str:
+                    return "1.0"
+
+                def init(self, force: bool):
+                    if ext_name in errors:
+                        raise ValueError(errors[ext_name])
+                    if ext_name == "a":
+                        assert "b" in init_calls
+                    init_calls.append(ext_name)
+                    self.manager.add_activation_file(ext_name, ".sh", "venv_prompt.sh.jinja")
+                    self.manager.register_ignored_pattern(f"{ext_name}/")
+
+            FakeExtension.dependencies = dependencies[ext_name]
+
+            class FakeEntryPoint:
+                name = ext_name
+
+                def load(self):
+                    return FakeExtension
+
+            return FakeEntryPoint()
+
+        entry_points = [fake_extension(n) for n in dependencies]
+        monkeypatch.setattr(importlib.metadata, "entry_points", lambda: FakeEntryPoints(entry_points))
+
+        # Init: dependency is initialized first, but indexes follow extensions order
+        self.check_manager(monkeypatch, "init", check_files=False)
+        venv_activate = self.test_folder / "venv" / VENV_BIN / "activate.d"
+        assert init_calls.index("b") < init_calls.index("a")
+        assert {f.name for f in venv_activate.glob("0[1-3]_*.sh")} == {"01_a.sh", "02_b.sh", "03_c.sh"}
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        assert m.state["contributions"]["c"]["ignoredPatterns"] == ["c/"]
+
+        # Failed extensions: errors are reported per extension, and dependent extension is not initialized
+        errors.update({"b": "b error", "c": "c error"})
+        try:
+            m.init(Namespace(force=True))
+            raise AssertionError("Shouldn't get here")
+        except AssertionError as e:
+            assert str(e).splitlines() == [
+                "Failed to execute a extension init: b extension init failed",
+                "Failed to execute b extension init: b error",
+                "Failed to execute c extension init: c error",
+            ]
+
+        # Circular dependencies
+        errors.clear()
+        dependencies["b"].append("a")
+        try:
+            m.init(Namespace(force=True))
+            raise AssertionError("Shouldn't get here")
+        except AssertionError as e:
+            assert str(e) == "Circular dependencies between extensions: a, b"
+
+    def test_extensions_cache(self, monkeypatch):
+        # Init with real extensions: discovery cache is written
+        self.check_manager(monkeypatch, "init", check_files=False)
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        cached_versions = m._read_extensions_cache()
+        assert "nmk-vscode" in cached_versions
+
+        # Init again: entry points are not even parsed
+        entry_points = importlib.metadata.entry_points
+
+        def no_entry_points():
+            raise AssertionError("unexpected entry points parsing")
+
+        monkeypatch.setattr(importlib.metadata, "entry_points", no_entry_points)
+        m.init()
+
+        # Nothing rendered: renderer is not even created
+        assert "renderer" not in m.__dict__
+
+        # Remove an extension version from state: extensions are loaded again
+        del m.state["extensions"]["nmk-vscode"]
+        try:
+            m.init()
+            raise AssertionError("Shouldn't get here")
+        except AssertionError as e:
+            assert str(e) == "unexpected entry points parsing"
+
+        # Corrupted distribution RECORD hash: cache is invalid
+        cache_file = self.test_folder / "venv" / ".buildenv" / "extensions.json"
+        with cache_file.open() as f:
+            cache = json.load(f)
+        for r in cache["key"]["records"]:
+            cache["key"]["records"][r] = "foo"
+        with cache_file.open("w") as f:
+            json.dump(cache, f)
+        assert m._read_extensions_cache() is None
+
+        # Unknown distribution: cache is invalid
+        cache["key"]["records"] = {str(self.test_folder / "unknown" / "RECORD"): "foo"}
+        with cache_file.open("w") as f:
+            json.dump(cache, f)
+        assert m._read_extensions_cache() is None
+
+        # Extension installed in editable mode: cache is not written
+        monkeypatch.setattr(importlib.metadata, "entry_points", entry_points)
+        m._parse_extensions()
+        assert cache_file.is_file()
+        read_text = importlib.metadata.PathDistribution.read_text
+        monkeypatch.setattr(
+            importlib.metadata.PathDistribution,
+            "read_text",
+            lambda d, f: '{"dir_info": {"editable": true}}' if f == "direct_url.json" else read_text(d, f),
+        )
+        m._parse_extensions()
+        assert not cache_file.exists()
+
+        # Corrupted direct_url.json file: not an editable distribution
+        monkeypatch.setattr(importlib.metadata.PathDistribution, "read_text", lambda d, f: "{" if f == "direct_url.json" else read_text(d, f))
+        m._parse_extensions()
+        assert cache_file.is_file()
+
+        # Extension opting out: cache is not written
+        monkeypatch.setattr(VsCodeInit, "cacheable", False)
+        m._parse_extensions()
+        assert not cache_file.exists()
+
     def test_extension_bad_class(self, monkeypatch):
         # Fake extension class
         class FakeExtension:
@@ -344,6 +846,170 @@ class TestBuildEnvManager(BuildEnvTestHelper):
             except AssertionError as e:
                 assert str(e) == "Out of project folder!"
 
+    @pytest.mark.skipif(is_windows(), reason="Activation snapshot is not supported on Windows")
+    def test_activation_snapshot(self, monkeypatch):
+        # Fake venv activation script
+        venv_bin = self.test_folder / "venv" / VENV_BIN
+        (venv_bin / "activate.d").mkdir(parents=True)
+        (venv_bin / "activate.d" / "00_activate.sh").touch()
+        (venv_bin / "activate").write_text(
+            f'export VIRTUAL_ENV="{venv_bin.parent}"\nexport PATH="$VIRTUAL_ENV/bin:$PATH"\nunset BUILDENV_TEST_UNSET\n'
+            + 'export BUILDENV_TEST_SUFFIX="${BUILDENV_TEST_SUFFIX}:extra"\nexport BUILDENV_TEST_DIGITS="${BUILDENV_TEST_DIGITS}1"\ntouch .activated\n'
+            + "for f in $VIRTUAL_ENV/bin/activate.d/*.sh; do source $f; done\n"
+        )
+        monkeypatch.setenv("BUILDENV_TEST_UNSET", "1")
+        monkeypatch.setenv("BUILDENV_TEST_SUFFIX", "base")
+        monkeypatch.setenv("BUILDENV_TEST_DIGITS", "1")
+        monkeypatch.delenv("VIRTUAL_ENV", raising=False)
+        activated = self.test_folder / ".activated"
+
+        # Init: environment changes are captured
+        m = BuildEnvManager(self.test_folder, venv_bin)
+        m.init(Namespace(skip=True))
+        lines = [line.strip() for line in m.activation_snapshot.read_text().splitlines()]
+        assert f"export VIRTUAL_ENV={venv_bin.parent}" in lines
+        assert f'export PATH={venv_bin}:"${{PATH}}"' in lines
+        assert "unset BUILDENV_TEST_UNSET" in lines
+        assert 'export BUILDENV_TEST_SUFFIX="${BUILDENV_TEST_SUFFIX}":extra' in lines
+        with (self.test_folder / ".buildenv" / ACTIVATION_ENV).open() as f:
+            changes = json.load(f)["changes"]
+        assert ["append", "BUILDENV_TEST_SUFFIX", ":extra"] in changes
+        assert ["set", "BUILDENV_TEST_DIGITS", "11"] in changes
+        assert activated.is_file()
+        activated.unlink()
+
+        # Replay snapshot: activation script is not invoked
+        def replay() -> list[str]:
+            script = "source .buildenv/activate.env.sh; echo $VIRTUAL_ENV; echo $PATH; echo $BUILDENV_TEST_SUFFIX"
+            cp = subprocess.run(
+                ["bash", "-c", script], cwd=self.test_folder, capture_output=True, check=True, env={"PATH": "/usr/bin:/bin", "BUILDENV_TEST_SUFFIX": "foo"}
+            )
+            return cp.stdout.decode().splitlines()
+
+        virtual_env, path, suffixed = replay()
+        assert virtual_env == str(venv_bin.parent)
+        assert path.startswith(f"{venv_bin}:") and path.endswith(":/usr/bin:/bin")
+        assert suffixed == "foo:extra"
+        assert not activated.is_file()
+
+        # Init again: snapshot is not captured again
+        snapshot_time = m.activation_snapshot.stat().st_mtime_ns
+        m.init(Namespace(skip=True))
+        assert m.activation_snapshot.stat().st_mtime_ns == snapshot_time
+
+        # Forced init: environment dependent values are captured again
+        monkeypatch.setenv("BUILDENV_TEST_DIGITS", "2")
+        m.init(Namespace(skip=True, force=True))
+        assert "export BUILDENV_TEST_DIGITS=21" in [line.strip() for line in m.activation_snapshot.read_text().splitlines()]
+        snapshot_time = m.activation_snapshot.stat().st_mtime_ns
+
+        # Modified activation file: activation script is invoked again
+        (venv_bin / "activate.d" / "01_new.sh").write_text("export BUILDENV_TEST_NEW=1\n")
+        os.utime(venv_bin / "activate.d" / "01_new.sh", ns=(snapshot_time + 10**9, snapshot_time + 10**9))
+        replay()
+        assert activated.is_file()
+
+        # Init again: snapshot is refreshed
+        m.init(Namespace(skip=True))
+        assert "export BUILDENV_TEST_NEW=1" in [line.strip() for line in m.activation_snapshot.read_text().splitlines()]
+
+        # Activation can't be captured (bash not found): activation scripts are always loaded
+        real_run = subprocess.run
+
+        def no_bash(args, **kwargs):
+            if args[0] == "bash":
+                raise FileNotFoundError("bash")
+            return real_run(args, **kwargs)
+
+        with monkeypatch.context() as mp:
+            mp.setattr(subprocess, "run", no_bash)
+            m.activation_snapshot.unlink()
+            m.init(Namespace(skip=True))
+        assert "source .buildenv/activate.sh" in m.activation_snapshot.read_text().splitlines()
+        assert not (self.test_folder / ".buildenv" / ACTIVATION_ENV).is_file()
+
+        # Failed activation
+        (venv_bin / "activate").write_text("false\n")
+        m.activation_snapshot.unlink()
+        m.init(Namespace(skip=True))
+        assert "source .buildenv/activate.sh" in m.activation_snapshot.read_text().splitlines()
+
+    def test_activation_bundle(self, monkeypatch):
+        # Init: bundle is generated from all activation scripts
+        self.check_manager(monkeypatch, "init", check_files=False)
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        bundle = m.venv_context.activation_bundle
+        lines = bundle.read_text().splitlines()
+        assert [line for line in lines if line.startswith("# 0")] == ["# 00_activate.sh", "# 01_set_prompt.sh", "# 02_completion.sh"]
+        assert "activate.bundle.sh" in (m.venv_bin_path / "activate").read_text()
+
+        # Init again: bundle is not generated again
+        bundle_time = bundle.stat().st_mtime_ns
+        m.init()
+        assert bundle.stat().st_mtime_ns == bundle_time
+
+        # Add an activation file: bundle is generated again
+        m.add_activation_file("extra", ".sh", "venv_prompt.sh.jinja")
+        assert "# 03_extra.sh" in bundle.read_text().splitlines()
+
+    @pytest.mark.skipif(is_windows(), reason="Activation bundle is not used on Windows")
+    def test_activation_bundle_sourced(self, monkeypatch):
+        # Init
+        self.check_manager(monkeypatch, "init", check_files=False)
+        monkeypatch.undo()
+        m = BuildEnvManager(self.test_folder, self.test_folder / "venv" / VENV_BIN)
+        activate_d = m.venv_context.activation_scripts_folder
+        env = {k: v for k, v in os.environ.items() if k != "VIRTUAL_ENV"}
+
+        def activate() -> str:
+            cp = subprocess.run(["bash", "-c", f"source {m.venv_bin_path / 'activate'} && echo $BUILDENV_TEST"], capture_output=True, check=True, env=env)
+            return cp.stdout.decode().strip()
+
+        # Script added in bundle (and scripts folder): sourced from bundle
+        (activate_d / "03_test.sh").write_text("export BUILDENV_TEST=script\n")
+        m.init()
+        bundle = m.venv_context.activation_bundle
+        bundle.write_text(bundle.read_text().replace("BUILDENV_TEST=script", "BUILDENV_TEST=bundle"))
+        assert activate() == "bundle"
+
+        # Script modified since bundle generation (folder is not modified): all scripts are sourced
+        (activate_d / "03_test.sh").write_text("export BUILDENV_TEST=modified\n")
+        os.utime(activate_d, ns=(bundle.stat().st_mtime_ns - 10**9,) * 2)
+        os.utime(activate_d / "03_test.sh", ns=(bundle.stat().st_mtime_ns + 10**9,) * 2)
+        assert activate() == "modified"
+        (activate_d / "03_test.sh").write_text("export BUILDENV_TEST=script\n")
+
+        # Script added since bundle generation: all scripts are sourced
+        (activate_d / "04_other.sh").touch()
+        os.utime(activate_d, ns=(bundle.stat().st_mtime_ns + 10**9,) * 2)
+        assert activate() == "script"
+
+        # Script with a return in a function: still bundled
+        (activate_d / "05_early.sh").write_text("# Don't return here\n_buildenv_test() {\n    return 0\n}\n")
+        (activate_d / "06_after.sh").write_text("export BUILDENV_TEST=after\n")
+        m.init()
+        assert bundle.is_file()
+        assert activate() == "after"
+
+        # Script with a top-level return: not bundled (following scripts must still be sourced)
+        (activate_d / "05_early.sh").write_text("if true; then\n    return 0\nfi\n")
+        m.init()
+        assert not bundle.exists()
+        assert activate() == "after"
+
+        # Script using BASH_SOURCE: not bundled either (must refer to the script itself)
+        (activate_d / "05_early.sh").unlink()
+        (activate_d / "06_after.sh").write_text("export BUILDENV_TEST=$(basename ${BASH_SOURCE[0]})\n")
+        m.init()
+        assert not bundle.exists()
+        assert activate() == "06_after.sh"
+
+        # Back to safe scripts: bundled again
+        (activate_d / "06_after.sh").unlink()
+        m.init()
+        assert bundle.is_file()
+        assert activate() == "script"
+
     def test_init_new(self):
         # Copy config to disable git look up
         new_env = self.test_folder / "new"
@@ -390,3 +1056,14 @@ class TestBuildEnvManager(BuildEnvTestHelper):
             received_commands[0] == f"{sys.executable} -m pip install --upgrade --upgrade-strategy=eager pip wheel setuptools buildenv<2 --require-virtualenv"
         )
         assert received_commands[1] == f"{sys.executable} -m pip install --upgrade --upgrade-strategy=eager --requirement=requirements.txt --require-virtualenv"
+
+        # Try upgrade with uv installer
+        self.prepare_config("buildenv-uv.cfg")
+        monkeypatch.setattr(shutil, "which", lambda name: f"/usr/bin/{name}")
+        m = BuildEnvManager(self.test_folder)
+        received_commands.clear()
+        m.upgrade(Namespace(eager=True))
+        assert received_commands == [
+            f"uv pip install --python {sys.executable} --upgrade pip wheel setuptools buildenv<2 --no-cache",
+            f"uv pip install --python {sys.executable} --upgrade --requirement=requirements.txt --no-cache",
+        ]
@@ -1,10 +1,32 @@
+import json
+import os
+import re
 import shutil
+import subprocess
+import sys
+import time
+from argparse import Namespace
 from pathlib import Path
 
-from buildenv.__main__ import buildenv
-from buildenv.manager import BUILDENV_OK
+import argcomplete
+import pytest
+
+import buildenv as buildenv_module
+from buildenv.__main__ import _LazyManager, buildenv
+from buildenv._internal.parser import RC_RUN_EXEC, RC_RUN_SCRIPT, BuildEnvParser
+from buildenv.loader import _PROFILE_SESSION_ENV, PROFILE_ENV, PROFILE_FILE, VENV_OK, BuildEnvLoader, profiler
+from buildenv.manager import STATE_MANIFEST
 from tests.commons import VENV_BIN, BuildEnvTestHelper
 
+# Modules that shall not be imported by "buildenv --version" command
+HEAVY_MODULES = ["jinja2", "argcomplete", "subprocess", "buildenv.manager", "buildenv._internal.render"]
+
+# Import time budget for buildenv modules in "buildenv --version" command (in ms; generous, as only a heavy import shall exceed it)
+IMPORT_TIME_BUDGET = 50
+
+# Pattern for -X importtime output lines
+IMPORT_TIME_PATTERN = re.compile("^import time: +([0-9]+) \\| +([0-9]+) \\| ( *)([^ ].*)$")
+
 
 class TestBuildenvParser(BuildEnvTestHelper):
     @property
@@ -22,25 +44,25 @@ class TestBuildenvParser(BuildEnvTestHelper):
         # Default command without loader: init
         rc = self.run_buildenv([])
         assert rc == 0
-        assert (self.venv_bin.parent / BUILDENV_OK).is_file()
+        assert (self.test_folder / ".buildenv" / STATE_MANIFEST).is_file()
 
     def test_default_cmd_with_loader(self, fake_no_venv, fake_local):
         # Default command without loader: shell (fake local env to make it working)
         rc = self.run_buildenv(["--from-loader=xx"])
         assert rc == 100
-        assert (self.venv_bin.parent / BUILDENV_OK).is_file()
+        assert (self.test_folder / ".buildenv" / STATE_MANIFEST).is_file()
 
     def test_shell_cmd_without_loader(self):
         # shell command with loader
         rc = self.run_buildenv(["shell"])
         assert rc == 1
-        assert not (self.venv_bin.parent / BUILDENV_OK).is_file()
+        assert not (self.test_folder / ".buildenv" / STATE_MANIFEST).is_file()
 
     def test_run_cmd_with_loader(self, fake_no_venv):
         # run command with loader
         rc = self.run_buildenv(["--from-loader=sh", "run", "true"])
         assert rc > 100
-        assert (self.venv_bin.parent / BUILDENV_OK).is_file()
+        assert (self.test_folder / ".buildenv" / STATE_MANIFEST).is_file()
         assert (self.test_folder / ".buildenv" / f"command.{rc}.sh").is_file()
 
     def test_run_cmd_with_loader_existing_cmd_files(self, fake_no_venv):
@@ -57,9 +79,182 @@ class TestBuildenvParser(BuildEnvTestHelper):
         # run command with loader
         rc = self.run_buildenv(["--from-loader=sh", "run", "true"])
         assert rc == 175
-        assert (self.venv_bin.parent / BUILDENV_OK).is_file()
+        assert (self.test_folder / ".buildenv" / STATE_MANIFEST).is_file()
         assert (self.test_folder / ".buildenv" / f"command.{rc}.sh").is_file()
 
         # Next try will return an error (no more candidate IDs)
         rc = self.run_buildenv(["--from-loader=sh", "run", "true"])
         assert rc == 1
+
+    def test_run_cmd_with_run_id(self, fake_no_venv):
+        # Stale command script
+        be = self.test_folder / ".buildenv"
+        be.mkdir(parents=True, exist_ok=True)
+        stale = be / "command.123.sh"
+        stale.touch()
+        os.utime(stale, (time.time() - 2 * 24 * 3600,) * 2)
+        not_removable = be / "command.456.sh"
+        not_removable.mkdir()
+        os.utime(not_removable, (time.time() - 2 * 24 * 3600,) * 2)
+        stale_run_id = be / "run.1-2-3"
+        stale_run_id.mkdir()
+        os.utime(stale_run_id, (time.time() - 2 * 24 * 3600,) * 2)
+
+        # run command with loader and run ID: fixed RC, and stale script removed
+        rc = self.run_buildenv(["--from-loader=sh", "--run-id=abc", "run", "true"])
+        assert rc == RC_RUN_SCRIPT
+        assert (be / "command.abc.sh").is_file()
+        assert not stale.is_file()
+        assert not stale_run_id.exists()
+
+        # Same run ID: refused
+        rc = self.run_buildenv(["--from-loader=sh", "--run-id=abc", "run", "true"])
+        assert rc == 1
+
+        # Invalid run ID: refused
+        rc = self.run_buildenv(["--from-loader=sh", "--run-id=../abc", "run", "true"])
+        assert rc == 1
+        assert not (self.test_folder / ".buildenv" / "command..").exists()
+
+    def test_run_cmd_with_loader_no_more_cmd_files(self, fake_no_venv):
+        # Touch all possible command files (legacy loading script)
+        be = self.test_folder / ".buildenv"
+        be.mkdir(parents=True, exist_ok=True)
+        for rc in range(RC_RUN_SCRIPT + 1, 256):
+            (be / f"command.{rc}.sh").touch()
+
+        # run command with loader: no available command file
+        rc = self.run_buildenv(["--from-loader=sh", "run", "true"])
+        assert rc == 1
+
+    def test_run_cmd_with_loader_exec_mode(self, fake_no_venv):
+        # run command with loader, in exec mode: no command script
+        self.prepare_config("buildenv-dontLookUp+exec.cfg")
+        rc = self.run_buildenv(["--from-loader=sh", "--run-id=abc", "run", "true"])
+        assert rc == RC_RUN_EXEC
+        assert len(list((self.test_folder / ".buildenv").glob("command.*"))) == 0
+        assert '_BUILDENV_FAST_RUN_MODE="exec"' in (self.test_folder / ".buildenv" / "fastpath.sh").read_text().splitlines()
+
+        # Legacy Linux loading script (no run ID): doesn't support exec mode
+        rc = self.run_buildenv(["--from-loader=sh", "run", "true"])
+        assert rc > RC_RUN_EXEC
+        assert (self.test_folder / ".buildenv" / f"command.{rc}.sh").is_file()
+
+        # Exec mode is only supported by Linux loading script
+        rc = self.run_buildenv(["--from-loader=cmd", "run", "true"])
+        assert rc > RC_RUN_EXEC
+        assert (self.test_folder / ".buildenv" / f"command.{rc}.cmd").is_file()
+
+    def test_profile(self, monkeypatch, fake_no_venv):
+        # Profiling disabled by default, and reset for this test
+        monkeypatch.setenv(PROFILE_ENV, "")
+        monkeypatch.delenv(_PROFILE_SESSION_ENV, raising=False)
+        trace = self.test_folder / ".buildenv" / PROFILE_FILE
+        trace.parent.mkdir(parents=True, exist_ok=True)
+        trace.write_text("stale content")
+
+        # Loader with --profile option (fake venv and subprocesses)
+        (self.test_folder / "venv").mkdir()
+        (self.test_folder / "venv" / VENV_OK).touch()
+        with monkeypatch.context() as m:
+            m.setattr(subprocess, "run", lambda args, capture_output=True, cwd=None, check=False: subprocess.CompletedProcess(args, 0, str(cwd).encode()))
+            BuildEnvLoader(self.test_folder).setup(["--profile"])
+        assert os.environ[PROFILE_ENV] == "1"
+
+        # Forwarded buildenv command: events appended to the same trace
+        rc = self.run_buildenv(["init"])
+        assert rc == 0
+        profiler.save()
+
+        # Check merged trace
+        events = json.loads(trace.read_text().strip().rstrip(",") + "]")
+        processes = [e["args"]["name"] for e in events if e["ph"] == "M"]
+        assert processes == ["buildenv-loader", "buildenv"]
+        phases = {e["name"]: e for e in events if e["ph"] == "X"}
+        for name in ["find venv", "git rev-parse --show-toplevel", "setup venv", "buildenv init", "update scripts", "render activate.sh"]:
+            assert name in phases
+        assert phases["git rev-parse --show-toplevel"]["cat"] == "subprocess"
+        assert phases["buildenv init"]["dur"] >= phases["update scripts"]["dur"]
+
+        # Option after sub-command: belongs to the run command, not to buildenv
+        monkeypatch.setenv(PROFILE_ENV, "")
+        self.run_buildenv(["--from-loader=sh", "run", "true", "--profile"])
+        assert os.environ[PROFILE_ENV] == ""
+        with monkeypatch.context() as m:
+            m.setattr(subprocess, "run", lambda args, capture_output=True, cwd=None, check=False: subprocess.CompletedProcess(args, 0, str(cwd).encode()))
+            BuildEnvLoader(self.test_folder).setup(["run", "foo", "--profile"])
+        assert os.environ[PROFILE_ENV] == ""
+
+    def test_completion_without_manager(self):
+        # Corrupted config file: manager can't be created
+        with (self.test_folder / "buildenv.cfg").open("w") as f:
+            f.write("not a config file")
+        assert self.run_buildenv(["init"]) == 1
+
+        # Completion still works, as manager is not created
+        out_file = self.test_folder / "completion.out"
+        comp_line = "buildenv "
+        env = dict(os.environ)
+        env.update({"_ARGCOMPLETE": "1", "COMP_LINE": comp_line, "COMP_POINT": str(len(comp_line)), "_ARGCOMPLETE_STDOUT_FILENAME": str(out_file)})
+        cp = subprocess.run([sys.executable, "-m", "buildenv"], cwd=self.test_folder, env=env, check=False, capture_output=True)
+        assert cp.returncode == 0
+        with out_file.open() as f:
+            candidates = f.read().split("\v")
+        assert "init" in candidates
+        assert "upgrade" in candidates
+
+    def test_version(self, capsys):
+        # Version is displayed without creating manager
+        with pytest.raises(SystemExit) as e:
+            buildenv(["--version"], self.test_folder / "unknown")
+        assert e.value.code == 0
+        assert capsys.readouterr().out == f"buildenv version {buildenv_module.__version__}\n"
+
+    def test_lazy_attributes(self):
+        # Lazy attributes
+        assert buildenv_module.BuildEnvLoader.__name__ == "BuildEnvLoader"
+        with pytest.raises(AttributeError):
+            buildenv_module.UnknownAttribute  # noqa: B018
+
+    def test_lazy_manager(self):
+        # Manager is created once, on first callback call
+        self.run_buildenv([])
+        m = _LazyManager(self.test_folder, self.venv_bin)
+        assert m._manager is None
+        m.callback("init")(Namespace())
+        manager = m._manager
+        assert manager is not None
+        m.callback("init")(Namespace())
+        assert m._manager is manager
+
+    def test_completion_setup(self, monkeypatch):
+        # Fake completion environment
+        completed = []
+        monkeypatch.setenv("_ARGCOMPLETE", "1")
+        monkeypatch.setattr(argcomplete, "autocomplete", lambda parser: completed.append(parser))
+        BuildEnvParser(None, None, None, None)
+        assert len(completed) == 1
+
+    def test_version_imports(self):
+        # List imported modules once version command is executed
+        script = "import sys\nfrom buildenv.__main__ import buildenv\ntry:\n    buildenv(['--version'])\nexcept SystemExit:\n    print(*sys.modules)\n"
+        cp = subprocess.run([sys.executable, "-c", script], cwd=self.test_folder, check=True, capture_output=True)
+        imported = set(cp.stdout.decode().splitlines()[-1].split())
+        assert "buildenv._internal.parser" in imported
+
+        # Check for heavy modules
+        for module in HEAVY_MODULES:
+            assert module not in imported, f"{module} module shall not be imported"
+
+    def test_import_time(self):
+        # Measure imports for version command
+        cp = subprocess.run([sys.executable, "-X", "importtime", "-m", "buildenv", "--version"], cwd=self.test_folder, check=True, capture_output=True)
+
+        # Sum cumulative time of buildenv modules imports (only the outer ones, as nested ones are already included)
+        total = 0
+        for line in cp.stderr.decode().splitlines():
+            m = IMPORT_TIME_PATTERN.match(line)
+            if m is not None and len(m.group(3)) == 0 and m.group(4).split(".")[0] == "buildenv":
+                total += int(m.group(2))
+        assert total > 0
+        assert total < IMPORT_TIME_BUDGET * 1000, f"Import time budget exceeded: {total // 1000}ms"